@@ -0,0 +1,68 @@
+"""
+Compare the catalogue read endpoints served over WSGI and ASGI under concurrent load.
+
+Start the two servers against the same database first, for example:
+
+    gunicorn ecommerce_api.wsgi -w 4 -b 127.0.0.1:8000
+    uvicorn ecommerce_api.asgi:application --workers 4 --port 8001
+
+then run:
+
+    python -m benchmarks.asgi_vs_wsgi --wsgi http://127.0.0.1:8000 --asgi http://127.0.0.1:8001 \
+        --product-id 1 --output asgi_vs_wsgi.json
+
+Three variants are measured per endpoint: the DRF view under WSGI, the same
+DRF view under ASGI (which runs in sync_to_async), and the async view under
+ASGI. A unique query parameter is added to each request by default so the
+response cache does not hide the ORM and serialization cost.
+"""
+import argparse
+import json
+import sys
+from benchmarks.http_load import run_load
+
+ENDPOINTS = {
+    'categories': ('/api/categories/', '/api/async/categories/'),
+    'product_list': ('/api/products/?page_size=100', '/api/async/products/?page_size=100'),
+    'product_detail': ('/api/products/{product_id}/', '/api/async/products/{product_id}/'),
+}
+
+
+def with_cache_buster(path, bust):
+    if not bust:
+        return path
+    return f"{path}{'&' if '?' in path else '?'}_={{index}}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--wsgi', required=True, help="Base URL of the WSGI server.")
+    parser.add_argument('--asgi', required=True, help="Base URL of the ASGI server.")
+    parser.add_argument('--product-id', type=int, default=1, help="Product used by the detail endpoint.")
+    parser.add_argument('--requests', type=int, default=2000, help="Requests per variant.")
+    parser.add_argument('--concurrency', type=int, default=64, help="Concurrent connections.")
+    parser.add_argument('--keep-cache', action='store_true', help="Do not bypass the response cache.")
+    parser.add_argument('--output', help="Write the results to this JSON file.")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, (sync_path, async_path) in ENDPOINTS.items():
+        sync_path = with_cache_buster(sync_path.replace('{product_id}', str(args.product_id)), not args.keep_cache)
+        async_path = with_cache_buster(async_path.replace('{product_id}', str(args.product_id)), not args.keep_cache)
+        results[name] = {
+            'wsgi_drf': run_load(args.wsgi, [sync_path], args.requests, args.concurrency),
+            'asgi_drf': run_load(args.asgi, [sync_path], args.requests, args.concurrency),
+            'asgi_async': run_load(args.asgi, [async_path], args.requests, args.concurrency),
+        }
+        for variant, stats in results[name].items():
+            print(f"{name:15} {variant:11} {stats['rps']:>9} req/s  p50 {stats['p50_ms']:>8} ms  "
+                  f"p99 {stats['p99_ms']:>8} ms  errors {stats['errors']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump({'concurrency': args.concurrency, 'requests': args.requests, 'results': results}, handle, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
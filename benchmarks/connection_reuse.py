@@ -0,0 +1,134 @@
+"""
+Benchmark: request latency with a new database connection per request, with
+persistent connections (CONN_MAX_AGE) and with the psycopg 3 pool.
+
+Requests go through Django's WSGI handler in-process, so the request_started
+and request_finished signals close or keep connections exactly as under a
+real server; the response cache is cleared before each request so every one
+queries the database. Each mode runs against the same throwaway test
+database:
+
+    python -m benchmarks.connection_reuse --requests 500
+
+The difference between the modes is the connection setup (TCP, TLS and
+authentication) that reuse removes from each request, so run it against the
+PostgreSQL server the application really uses; on SQLite, connecting is
+nearly free and the modes are close. The pool mode needs `psycopg[pool]` and
+is skipped without it.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from io import BytesIO
+from wsgiref.util import setup_testing_defaults
+
+
+def connect_time(connection, samples=20):
+    """
+    Mean seconds to open a fresh connection and run its first query.
+    """
+    timings = []
+    for _ in range(samples):
+        connection.close()
+        started = time.perf_counter()
+        connection.ensure_connection()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        timings.append(time.perf_counter() - started)
+    connection.close()
+    return statistics.fmean(timings)
+
+
+def measure(handler, path, requests):
+    """
+    Latency samples, in milliseconds, of GET requests to `path` through the WSGI handler.
+    """
+    from django.core.cache import cache
+
+    path, _, query = path.partition('?')
+    samples = []
+    for _ in range(requests):
+        environ = {'PATH_INFO': path, 'QUERY_STRING': query, 'REQUEST_METHOD': 'GET', 'wsgi.input': BytesIO()}
+        setup_testing_defaults(environ)
+        cache.clear()
+        started = time.perf_counter()
+        response = handler(environ, lambda status, headers: None)
+        b''.join(response)
+        response.close()  # Sends request_finished, which closes or keeps the connection
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def configure(connection, mode):
+    """
+    Switch the default connection to `mode`: 'new' per request, 'persistent' or 'pool'.
+    """
+    connection.close()
+    if connection.vendor == 'postgresql':
+        connection.close_pool()
+    options = connection.settings_dict['OPTIONS']
+    options.pop('pool', None)
+    connection.settings_dict['CONN_HEALTH_CHECKS'] = True
+    if mode == 'pool':
+        connection.settings_dict['CONN_MAX_AGE'] = 0
+        options['pool'] = {'min_size': 1, 'max_size': 4}
+    else:
+        connection.settings_dict['CONN_MAX_AGE'] = 0 if mode == 'new' else 60
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500, help="Requests measured per mode.")
+    parser.add_argument('--path', default='/api/products/{product_id}/', help="Endpoint requested; {product_id} is filled in.")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce_api.settings')
+    import django
+    django.setup()
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+    from products.models import Category, Product
+
+    modes = ['new', 'persistent']
+    if connection.vendor == 'postgresql':
+        try:
+            import psycopg_pool  # noqa: F401
+            modes.append('pool')
+        except ImportError:
+            print("psycopg_pool is not installed; skipping the pool mode")
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    original = dict(connection.settings_dict, OPTIONS=dict(connection.settings_dict['OPTIONS']))
+    try:
+        category = Category.objects.create(name="Benchmark")
+        product = Product.objects.create(category=category, name="Benchmark", description="", price=10, stock_quantity=1)
+        path = args.path.format(product_id=product.pk)
+        handler = WSGIHandler()
+        setup = connect_time(connection)
+
+        results = {}
+        for mode in modes:
+            configure(connection, mode)
+            measure(handler, path, 10)  # Warm up, and fill the pool
+            results[mode] = sorted(measure(handler, path, args.requests))
+    finally:
+        configure(connection, 'new')
+        connection.settings_dict.update(original)
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+    print(f"{args.requests} requests per mode to {path} ({connection.vendor}); connection setup {setup * 1000:.3f} ms")
+    baseline = statistics.median(results['new'])
+    for mode, samples in results.items():
+        median = statistics.median(samples)
+        p99 = samples[min(len(samples) - 1, round(0.99 * len(samples)) - 1)]
+        print(f"{mode:10} p50 {median:8.3f} ms  p99 {p99:8.3f} ms  saved per request {baseline - median:7.3f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
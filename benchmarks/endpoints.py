@@ -0,0 +1,300 @@
+"""
+Query-count and latency benchmark for every endpoint in `products/urls.py`.
+
+Seeds a throwaway test database with a realistic catalogue (by default 10,000
+products in a six-level category tree with two discounts each), then requests
+each endpoint repeatedly with the response cache cleared, so every request
+does its full database and serialization work. For each endpoint it records
+the number of queries, checks it against the endpoint's budget and measures
+latency percentiles. The results are written as JSON so runs can be compared
+across commits:
+
+    python -m benchmarks.endpoints --output before.json
+    python -m benchmarks.endpoints --output after.json --compare before.json
+
+It runs against the configured database backend: SQLite in memory, or a
+local PostgreSQL where Django creates and drops a `test_` database. The exit
+status is non-zero when an endpoint exceeds its budget or, with --compare,
+runs more queries than in the baseline.
+
+Budgets are upper bounds that hold on both backends (PostgreSQL runs one
+extra UPDATE per product write to maintain the search vectors). They must not
+depend on the catalogue size: the same table is asserted by the test suite on
+a small catalogue.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from decimal import Decimal
+
+# name, method, path, budget. Paths are formatted with `product_id`, `category_id`,
+# `root_id` (a category with a deep subtree), `deep_page` (a middle page), `batch_ids` (a cart's
+# worth of product IDs and one unknown ID) and `index`; `reservation` is the reference of a
+# reservation made for each request, outside its query count, so it can be released or committed.
+ENDPOINTS = [
+    ('category_list', 'GET', '/api/categories/', 1),
+    ('category_tree', 'GET', '/api/categories/?tree=true', 1),
+    ('category_subtree', 'GET', '/api/categories/?tree=true&root_id={root_id}', 2),
+    ('product_list', 'GET', '/api/products/?page_size=100', 2),
+    ('product_list_deep_page', 'GET', '/api/products/?page_size=100&page={deep_page}&ordering=-final_price', 2),
+    ('product_list_filtered', 'GET', '/api/products/?category_id={root_id}&include_descendants=true&min_price=10&in_stock=true', 3),
+    ('product_list_facets', 'GET', '/api/products/?facets=true', 3),
+    ('product_list_cursor', 'GET', '/api/products/?pagination=cursor&page_size=100&ordering=price', 1),
+    ('product_search', 'GET', '/api/products/search/?q=Product 1', 1),
+    ('product_export', 'GET', '/api/products/export/?category_id={category_id}', 1),
+    ('product_detail', 'GET', '/api/products/{product_id}/', 2),
+    ('product_batch', 'GET', '/api/products/batch/?ids={batch_ids}', 1),
+    ('async_category_list', 'GET', '/api/async/categories/', 1),
+    ('async_product_list', 'GET', '/api/async/products/?page_size=100', 2),
+    ('async_product_list_facets', 'GET', '/api/async/products/?facets=true', 3),
+    ('async_product_detail', 'GET', '/api/async/products/{product_id}/', 2),
+    ('product_create', 'POST', '/api/products/create/', 4),
+    ('product_bulk_create', 'POST', '/api/products/bulk/', 4),
+    ('product_bulk_upsert', 'POST', '/api/products/bulk/?upsert=true', 6),
+    ('discount_create', 'POST', '/api/discounts/', 3),
+    ('discount_campaign', 'POST', '/api/discounts/campaigns/', 5),
+    ('stock_reserve', 'POST', '/api/stock/reservations/', 3),
+    ('stock_reservation_detail', 'GET', '/api/stock/reservations/{reservation}/', 1),
+    ('stock_reservation_release', 'POST', '/api/stock/reservations/{reservation}/release/', 4),
+    ('stock_reservation_commit', 'POST', '/api/stock/reservations/{reservation}/commit/', 1),
+]
+
+
+TRANSACTION_CONTROL = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE SAVEPOINT')
+
+
+def request_body(name, context, index):
+    """
+    JSON body for the write endpoints; names include `index` so repeated requests don't collide.
+    """
+    category = context['category_id']
+    if name == 'product_create':
+        return {'name': f"Bench create {index}", 'description': "Benchmark product", 'price': "19.99",
+                'stock_quantity': 5, 'category': category}
+    if name == 'product_bulk_create':
+        return [{'name': f"Bench bulk {index}-{row}", 'description': "Benchmark product", 'price': "9.99",
+                 'stock_quantity': 1, 'category': category} for row in range(100)]
+    if name == 'product_bulk_upsert':
+        # Half updates of existing products, half new ones.
+        return [{'name': f"Product {row}" if row % 2 else f"Bench upsert {index}-{row}", 'description': "Upserted",
+                 'price': "29.99", 'stock_quantity': 2, 'category': category} for row in range(1, 101)]
+    if name == 'discount_create':
+        return {'product': context['product_id'], 'discount_type': 'PERCENTAGE', 'value': "5.00"}
+    if name == 'discount_campaign':
+        # A fixed set of products: the write endpoints keep growing the category they create in.
+        return {'campaign_key': f"bench-{index}", 'discount_type': 'PERCENTAGE', 'value': "10.00",
+                'product_ids': context['campaign_ids']}
+    if name == 'stock_reserve':
+        return {'items': [{'product': context['product_id'], 'quantity': 1}]}
+    if name in ('stock_reservation_release', 'stock_reservation_commit'):
+        return {}  # The reservation is in the path
+    return None
+
+
+def seed_catalogue(products=10000, depth=6, fanout=3, discounts_per_product=2):
+    """
+    Create a category tree `depth` levels deep with `fanout` children per category,
+    spread `products` over its categories, and add discounts to every product.
+
+    Returns the formatting context for `ENDPOINTS` paths, plus `campaign_ids`, the products a
+    campaign request targets.
+    """
+    from products.models import Category, Discount, Product
+
+    level = [None]
+    categories = []
+    for depth_index in range(depth):
+        next_level = []
+        for parent in level:
+            for child in range(fanout if parent else 1):
+                next_level.append(Category(name=f"Category {len(categories) + len(next_level)}", parent=parent))
+        Category.objects.bulk_create(next_level)
+        categories += next_level
+        level = next_level
+    Category.objects.rebuild_paths()
+
+    Product.objects.bulk_create([
+        Product(
+            name=f"Product {index}",
+            description=f"Description of product {index}",
+            price=Decimal(5 + index % 500) + Decimal('0.99'),
+            stock_quantity=index % 7,
+            category=categories[index % len(categories)],
+        )
+        for index in range(1, products + 1)
+    ], batch_size=1000)
+
+    product_ids = list(Product.objects.values_list('id', flat=True))
+    Product.objects.filter(pk=product_ids[len(product_ids) // 2]).update(stock_quantity=1000000)  # Reserved from repeatedly
+    Discount.objects.bulk_create([
+        Discount(
+            product_id=product_id,
+            discount_type=Discount.PERCENTAGE if number % 2 else Discount.FIXED,
+            value=Decimal(5 + (product_id + number) % 20),
+        )
+        for product_id in product_ids for number in range(discounts_per_product)
+    ], batch_size=1000)
+
+    return {
+        'product_id': product_ids[len(product_ids) // 2],
+        'category_id': categories[-1].id,
+        'root_id': categories[0].id,
+        'deep_page': max(len(product_ids) // 200, 1),
+        'batch_ids': ",".join(map(str, product_ids[-50:][::-1] + [product_ids[-1] + 1])),
+        'campaign_ids': product_ids[:100],
+    }
+
+
+def call_endpoint(client, endpoint, context, index):
+    """
+    Request an endpoint with the response cache cleared.
+
+    Returns `(status_code, queries, seconds)`; streamed bodies are consumed, and
+    transaction control statements (BEGIN, COMMIT, savepoints inside a test
+    transaction) are not counted.
+    """
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    name, method, path, _ = endpoint
+    if '{reservation}' in path:
+        from products.models import StockReservation
+        reservation, = StockReservation.objects.reserve({context['product_id']: 1}, ttl=60)
+        context = dict(context, reservation=reservation.reference)
+    path = path.format(index=index, **context)
+    cache.clear()
+    with CaptureQueriesContext(connection) as captured:
+        started = time.perf_counter()
+        if method == 'GET':
+            response = client.get(path)
+        else:
+            response = client.post(path, request_body(name, context, index), format='json')
+        if response.streaming:
+            b''.join(response.streaming_content)
+        elapsed = time.perf_counter() - started
+    queries = [query for query in captured.captured_queries if not query['sql'].upper().startswith(TRANSACTION_CONTROL)]
+    return response.status_code, len(queries), elapsed
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+def run(iterations, seed_options):
+    from django.db import connection
+    from rest_framework.test import APIClient
+
+    started = time.perf_counter()
+    context = seed_catalogue(**seed_options)
+    seed_seconds = time.perf_counter() - started
+    client = APIClient()
+
+    results = {}
+    for endpoint in ENDPOINTS:
+        name, method, path, budget = endpoint
+        call_endpoint(client, endpoint, context, index='warmup')
+        samples, queries, statuses = [], 0, set()
+        for index in range(iterations):
+            status_code, query_count, seconds = call_endpoint(client, endpoint, context, index)
+            samples.append(seconds * 1000)
+            queries = max(queries, query_count)
+            statuses.add(status_code)
+        results[name] = {
+            'method': method,
+            'path': path,
+            'status': sorted(statuses),
+            'queries': queries,
+            'budget': budget,
+            'within_budget': queries <= budget,
+            'p50_ms': round(percentile(samples, 0.50), 3),
+            'p95_ms': round(percentile(samples, 0.95), 3),
+            'p99_ms': round(percentile(samples, 0.99), 3),
+            'mean_ms': round(statistics.fmean(samples), 3),
+        }
+    return {
+        'meta': {
+            'vendor': connection.vendor,
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'iterations': iterations,
+            'seed': seed_options,
+            'seed_seconds': round(seed_seconds, 2),
+        },
+        'endpoints': results,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline):
+    """
+    Print per-endpoint changes against a baseline report; returns the endpoints whose query count grew.
+    """
+    regressions = []
+    for name, result in report['endpoints'].items():
+        before = baseline['endpoints'].get(name)
+        if before is None:
+            continue
+        if result['queries'] > before['queries']:
+            regressions.append(name)
+        print(f"{name:25} queries {before['queries']:>3} -> {result['queries']:<3} "
+              f"p50 {before['p50_ms']:>9} -> {result['p50_ms']:<9} ms  p99 {before['p99_ms']:>9} -> {result['p99_ms']} ms")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=10000, help="Products to seed.")
+    parser.add_argument('--depth', type=int, default=6, help="Levels in the category tree.")
+    parser.add_argument('--fanout', type=int, default=3, help="Subcategories per category.")
+    parser.add_argument('--discounts', type=int, default=2, help="Discounts per product.")
+    parser.add_argument('--iterations', type=int, default=30, help="Measured requests per endpoint.")
+    parser.add_argument('--output', help="Write the JSON report to this file.")
+    parser.add_argument('--compare', help="Baseline JSON report to compare against.")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce_api.settings')
+    import django
+    django.setup()
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        report = run(args.iterations, {
+            'products': args.products, 'depth': args.depth, 'fanout': args.fanout,
+            'discounts_per_product': args.discounts,
+        })
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+    failures = [name for name, result in report['endpoints'].items() if not result['within_budget']]
+    for name, result in report['endpoints'].items():
+        flag = '' if result['within_budget'] else '  OVER BUDGET'
+        print(f"{name:25} {result['queries']:>3}/{result['budget']:<3} queries  p50 {result['p50_ms']:>9} ms  "
+              f"p95 {result['p95_ms']:>9} ms  p99 {result['p99_ms']:>9} ms{flag}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as handle:
+            failures += compare(report, json.load(handle))
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
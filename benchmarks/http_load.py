@@ -0,0 +1,81 @@
+"""
+Minimal closed-loop HTTP load generator shared by the benchmark scripts.
+
+Each worker thread keeps one keep-alive connection and sends its requests
+back to back; latencies are recorded per request. Only the standard library
+is used so the benchmarks run anywhere the project does.
+"""
+import http.client
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+
+def percentile(samples, fraction):
+    """
+    Nearest-rank percentile of a list of numbers.
+    """
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run_load(base_url, paths, total_requests, concurrency, headers=None):
+    """
+    Send `total_requests` GETs, cycling through `paths`, from `concurrency` connections.
+
+    Returns a dict with requests per second and latency percentiles in
+    milliseconds, plus the number of non-2xx/304 responses.
+    """
+    target = urlsplit(base_url)
+    connection_class = http.client.HTTPSConnection if target.scheme == 'https' else http.client.HTTPConnection
+    latencies, errors = [], 0
+    lock = threading.Lock()
+    counter = iter(range(total_requests))
+
+    def worker():
+        nonlocal errors
+        connection = connection_class(target.hostname, target.port, timeout=30)
+        local_latencies, local_errors = [], 0
+        while True:
+            with lock:
+                index = next(counter, None)
+            if index is None:
+                break
+            path = paths[index % len(paths)].format(index=index)
+            started = time.perf_counter()
+            try:
+                connection.request('GET', path, headers=headers or {})
+                response = connection.getresponse()
+                response.read()
+                if response.status >= 400:
+                    local_errors += 1
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                connection.close()
+                connection = connection_class(target.hostname, target.port, timeout=30)
+            local_latencies.append((time.perf_counter() - started) * 1000)
+        connection.close()
+        with lock:
+            latencies.extend(local_latencies)
+            errors += local_errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    elapsed = time.perf_counter() - started
+
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'p50_ms': round(percentile(latencies, 0.50), 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 0.99), 2) if latencies else None,
+        'mean_ms': round(statistics.fmean(latencies), 2) if latencies else None,
+    }
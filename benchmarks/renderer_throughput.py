@@ -0,0 +1,59 @@
+"""
+Microbenchmark: pages per second rendered by DRF's JSONRenderer vs FastJSONRenderer.
+
+Renders a standard paginated envelope of 100 products, built in memory:
+
+    python -m benchmarks.renderer_throughput --page-size 100 --repeat 2000
+"""
+import argparse
+import os
+import sys
+import time
+from benchmarks.serializer_throughput import build_products
+
+
+def best_rate(render, repeat, rounds=5):
+    best = float('inf')
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            render()
+        best = min(best, time.perf_counter() - started)
+    return repeat / best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--page-size', type=int, default=100, help="Products on the rendered page.")
+    parser.add_argument('--repeat', type=int, default=2000, help="Pages rendered per round; the fastest of 5 rounds is reported.")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce_api.settings')
+    import django
+    django.setup()
+    from rest_framework.renderers import JSONRenderer
+    from products.serializers import PRODUCT_ROW_FIELDS, represent_product_row
+    from utils import renderers
+
+    rows = [{field: getattr(product, field) for field in PRODUCT_ROW_FIELDS} for product in build_products(args.page_size)]
+    page = {
+        "status": 200,
+        "message": "Products retrieved successfully",
+        "count": 10000,
+        "next": "http://testserver/api/products/?page=2",
+        "previous": None,
+        "data": represent_product_row.many(rows),
+    }
+    size = len(JSONRenderer().render(page))
+    stdlib_rate = best_rate(lambda: JSONRenderer().render(page), args.repeat)
+    print(f"JSONRenderer      {stdlib_rate:>10,.0f} pages/s  ({size:,} bytes per page)")
+    if renderers.orjson is None:
+        print("FastJSONRenderer  orjson is not installed; it falls back to JSONRenderer")
+        return 0
+    fast_rate = best_rate(lambda: renderers.FastJSONRenderer().render(page), args.repeat)
+    print(f"FastJSONRenderer  {fast_rate:>10,.0f} pages/s  ({fast_rate / stdlib_rate:.1f}x)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+Load test: many concurrent buyers reserving one hot SKU must never oversell it.
+
+Creates a throwaway test database with one product holding `--stock` units,
+then starts `--buyers` threads that each keep reserving `--quantity` units
+through `StockReservation.objects.reserve` until they are refused. Every
+thread uses its own database connection, so on PostgreSQL the guarded
+decrements really race; SQLite serializes writers, and its "database is
+locked" errors are retried and reported.
+
+    python -m benchmarks.stock_contention --stock 500 --buyers 64
+
+The run fails (exit status 1) if more units were reserved than were in
+stock, if the stock went negative, or if the reserved units and the
+remaining stock do not add up to the starting stock.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+
+def buyer(product_id, quantity, results, lock, barrier):
+    from django.db import OperationalError, connection
+    from products.models import InsufficientStock, StockReservation
+
+    reserved = conflicts = retries = 0
+    barrier.wait()
+    try:
+        while True:
+            try:
+                StockReservation.objects.reserve({product_id: quantity}, ttl=600)
+                reserved += quantity
+            except InsufficientStock:
+                conflicts += 1
+                break
+            except OperationalError:
+                retries += 1  # SQLite lock contention
+                time.sleep(0.001)
+    finally:
+        connection.close()
+        with lock:
+            results['reserved'] += reserved
+            results['conflicts'] += conflicts
+            results['retries'] += retries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stock', type=int, default=500, help="Units of the hot product in stock.")
+    parser.add_argument('--buyers', type=int, default=64, help="Concurrent buyer threads.")
+    parser.add_argument('--quantity', type=int, default=1, help="Units per reservation.")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce_api.settings')
+    import django
+    django.setup()
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+    from products.models import Category, Product, StockReservation
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        category = Category.objects.create(name="Hot")
+        product = Product.objects.create(category=category, name="Hot SKU", description="", price=10, stock_quantity=args.stock)
+        results = {'reserved': 0, 'conflicts': 0, 'retries': 0}
+        lock, barrier = threading.Lock(), threading.Barrier(args.buyers)
+        threads = [
+            threading.Thread(target=buyer, args=(product.pk, args.quantity, results, lock, barrier))
+            for _ in range(args.buyers)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        remaining = Product.objects.values_list('stock_quantity', flat=True).get(pk=product.pk)
+        held = sum(StockReservation.objects.filter(product=product).values_list('quantity', flat=True))
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+    reservations = results['reserved'] // args.quantity
+    print(f"{args.buyers} buyers, {args.stock} units in stock, {args.quantity} per reservation ({connection.vendor})")
+    print(f"reserved {results['reserved']} units in {reservations} reservations, {results['conflicts']} refused, "
+          f"{results['retries']} lock retries, {elapsed:.2f}s ({reservations / elapsed:,.0f} reservations/s)")
+    print(f"remaining stock {remaining}, units held by reservations {held}")
+
+    consistent = (
+        results['reserved'] <= args.stock
+        and remaining >= 0
+        and results['reserved'] == held
+        and held + remaining == args.stock
+    )
+    print("OK: no oversell" if consistent else "FAILED: stock and reservations do not add up")
+    return 0 if consistent else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
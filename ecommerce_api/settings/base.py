@@ -16,6 +16,7 @@ import os
 from pathlib import Path
 from datetime import timedelta
 from decouple import config, Csv
+from django.core.exceptions import ImproperlyConfigured
 import datetime
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -45,6 +46,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     'corsheaders',
     "products",
@@ -53,6 +55,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "utils.metrics.RequestMetricsMiddleware",  # First, so its timings cover the whole stack
+    "utils.db_router.ReplicaPinningMiddleware",  # Before anything that reads from the database
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     'corsheaders.middleware.CorsMiddleware',
@@ -99,10 +103,90 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         # 'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    # FastJSONRenderer encodes with orjson when installed; use
+    # 'rest_framework.renderers.JSONRenderer' for the stdlib encoder.
+    'DEFAULT_RENDERER_CLASSES': (
+        'utils.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'utils.pagination_utils.CustomPagination',
     'EXCEPTION_HANDLER': 'utils.response_utils.custom_exception_handler',
 }
 
+# Cache used for versioned API responses. Local memory by default; set
+# CACHE_BACKEND/CACHE_LOCATION for e.g. a file cache, or REDIS_URL to share
+# entries between workers (requires the `redis` package).
+#
+# Invalidation bumps version counters stored in this cache. A local memory
+# cache is private to one process, so with several workers a write bumps the
+# versions of its own worker only, and the others keep serving stale
+# responses until RESPONSE_CACHE_TIMEOUT. Running more than one worker
+# (WEB_CONCURRENCY, which gunicorn also reads) therefore needs a cache all
+# workers share: Redis, Memcached, or a file cache on a single host.
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+            'LOCATION': config('CACHE_LOCATION', default='ecommerce-api'),
+        }
+    }
+RESPONSE_CACHE_TIMEOUT = config('RESPONSE_CACHE_TIMEOUT', default=300, cast=int)  # Seconds
+WEB_CONCURRENCY = config('WEB_CONCURRENCY', default=1, cast=int)  # Worker processes serving the API
+if WEB_CONCURRENCY > 1 and CACHES['default']['BACKEND'] == 'django.core.cache.backends.locmem.LocMemCache':
+    raise ImproperlyConfigured(
+        "WEB_CONCURRENCY > 1 needs a cache shared by the workers (set REDIS_URL or CACHE_BACKEND); "
+        "LocMemCache would serve stale responses after writes handled by another worker."
+    )
+
+# Lower bounds of the final-price buckets counted by the product list facets.
+PRODUCT_PRICE_FACET_EDGES = config('PRODUCT_PRICE_FACET_EDGES', default='0,25,50,100,250,500,1000', cast=Csv(cast=int))
+
+# Text search configuration used for the product search vectors and queries.
+SEARCH_CONFIG = config('SEARCH_CONFIG', default='english')
+
+# Default and maximum lifetime, in seconds, of a stock reservation that is neither committed nor released.
+STOCK_RESERVATION_TTL = config('STOCK_RESERVATION_TTL', default=900, cast=int)
+STOCK_RESERVATION_MAX_TTL = config('STOCK_RESERVATION_MAX_TTL', default=3600, cast=int)
+
+# Read replicas (aliases in DATABASES, see utils.db_router). Reads of safe requests go to a replica
+# lagging at most REPLICA_MAX_LAG seconds, checked every REPLICA_LAG_CHECK_INTERVAL seconds; a client
+# that wrote reads from the primary for the next REPLICA_PIN_SECONDS.
+DATABASE_ROUTERS = ['utils.db_router.PrimaryReplicaRouter']
+DATABASE_REPLICAS = []  # Set by the environment's settings from replica_databases()
+REPLICA_MAX_LAG = config('REPLICA_MAX_LAG', default=5, cast=float)
+REPLICA_LAG_CHECK_INTERVAL = config('REPLICA_LAG_CHECK_INTERVAL', default=2, cast=float)
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=10, cast=int)
+
+
+def replica_databases(primary):
+    """
+    DATABASES entries for the read replicas of `primary`, listed in POSTGRES_REPLICA_HOSTS as host[:port].
+
+    Each replica copies the primary's settings, and mirrors it in tests.
+    """
+    replicas = {}
+    for index, replica in enumerate(config('POSTGRES_REPLICA_HOSTS', default='', cast=Csv()), start=1):
+        host, _, port = replica.partition(':')
+        replicas[f'replica_{index}'] = dict(primary, HOST=host, PORT=port or primary['PORT'], TEST={'MIRROR': 'default'})
+    return replicas
+
+
+# Per-request query and latency metrics, served in the Prometheus format at /metrics.
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+# Addresses (REMOTE_ADDR, i.e. the scraper connecting to the worker directly) allowed to read /metrics;
+# staff users may read it from anywhere.
+METRICS_ALLOWED_IPS = config('METRICS_ALLOWED_IPS', default='127.0.0.1,::1', cast=Csv())
+# Requests running more database queries than this are logged and counted; 0 disables the check.
+REQUEST_QUERY_BUDGET = config('REQUEST_QUERY_BUDGET', default=20, cast=int)
+
 # Configure Simple JWT with token lifetime and blacklist settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': datetime.timedelta(minutes=1440),  # Adjust based on your needs
@@ -17,3 +17,5 @@ DATABASES = {
     }
 }
 
+DATABASES.update(replica_databases(DATABASES["default"]))
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
@@ -4,6 +4,9 @@ CORS_ALLOWED_ORIGINS = config("CORS_ALLOWED_ORIGINS", cast=Csv())
 CSRF_TRUSTED_ORIGINS = config('CSRF_TRUSTED_ORIGINS', cast=Csv())
 DEBUG = False
 #################################################### DATABASE #####################################
+# Django's native psycopg 3 connection pool; requires `psycopg[pool]` in place of psycopg2.
+POSTGRES_POOL = config("POSTGRES_POOL", default=False, cast=bool)
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql_psycopg2",
@@ -12,5 +15,20 @@ DATABASES = {
         "PASSWORD": config("POSTGRES_PASSWORD"),
         "HOST": config("POSTGRES_HOST"),
         "PORT": config("POSTGRES_PORT"),
+        # Seconds a connection is reused across requests instead of reconnecting; 0 closes it after
+        # every request. Must be 0 with the pool, which keeps the connections instead.
+        "CONN_MAX_AGE": 0 if POSTGRES_POOL else config("POSTGRES_CONN_MAX_AGE", default=60, cast=int),
+        # Check that a reused (or pooled) connection still works before a request uses it.
+        "CONN_HEALTH_CHECKS": config("POSTGRES_CONN_HEALTH_CHECKS", default=True, cast=bool),
+        "OPTIONS": {},
     }
 }
+if POSTGRES_POOL:
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": config("POSTGRES_POOL_MIN_SIZE", default=2, cast=int),
+        "max_size": config("POSTGRES_POOL_MAX_SIZE", default=10, cast=int),
+        "timeout": config("POSTGRES_POOL_TIMEOUT", default=10, cast=float),  # Seconds to wait for a free connection
+    }
+
+DATABASES.update(replica_databases(DATABASES["default"]))
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
@@ -1,5 +1,7 @@
 from django.contrib import admin
+from django.db.models import Count, Prefetch
 from django.utils.html import format_html
+from utils.pagination_utils import EstimatedCountPaginator
 from .models import Category, Product, Discount
 
 
@@ -24,10 +26,11 @@ class CategoryAdmin(admin.ModelAdmin):
 
     def subcategories_count(self, obj):
         """
-        Displays the number of subcategories for a category.
+        Displays the number of subcategories for a category, counted by the changelist query.
         """
-        return obj.subcategories.count()
+        return obj.subcategory_count
     subcategories_count.short_description = 'Subcategories Count'
+    subcategories_count.admin_order_field = 'subcategory_count'
 
     def subcategories_list(self, obj):
         """
@@ -38,9 +41,14 @@ class CategoryAdmin(admin.ModelAdmin):
 
     def get_queryset(self, request):
         """
-        Optimize queryset for admin list view.
+        Count the subcategories in the list query, join the parent and prefetch only the subcategory names.
         """
-        return super().get_queryset(request).prefetch_related('subcategories', 'parent')
+        return (
+            super().get_queryset(request)
+            .select_related('parent')
+            .annotate(subcategory_count=Count('subcategories'))
+            .prefetch_related(Prefetch('subcategories', queryset=Category.objects.only('name', 'parent').order_by('name')))
+        )
 
 
 ############################### PRODUCT ADMIN ###############################
@@ -54,14 +62,32 @@ class ProductAdmin(admin.ModelAdmin):
     list_filter = ('category', 'created')
     ordering = ('-created',)
     readonly_fields = ('created', 'discounted_price')
+    # Large changelists are counted from the planner's estimate, and the unfiltered total is not counted at all.
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     def discounted_price(self, obj):
         """
-        Calculates the final price after applying the highest discount.
+        Displays the stored price after applying the highest discount, without querying the discounts.
         """
-        final_price = Discount.calculate_final_price(obj)
+        final_price = obj.final_price
         return format_html(f'<span style="color: green;">${final_price:.2f}</span>') if final_price else "$0.00"
     discounted_price.short_description = 'Discounted Price'
+    discounted_price.admin_order_field = 'final_price'
+
+    def get_queryset(self, request):
+        """
+        Load each row's category in the same query as the products.
+        """
+        return super().get_queryset(request).select_related('category')
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Search through the indexed full-text document instead of icontains scans.
+        """
+        if not search_term:
+            return queryset, False
+        return queryset.search(search_term), False
 
 
 ############################### DISCOUNT ADMIN ###############################
@@ -70,10 +96,15 @@ class DiscountAdmin(admin.ModelAdmin):
     """
     Admin configuration for the Discount model.
     """
-    list_display = ('id', 'product', 'discount_type', 'value', 'effective_discount', 'product_price', 'discounted_price')
+    list_display = (
+        'id', 'product', 'discount_type', 'value', 'effective_discount', 'starts_at', 'ends_at',
+        'product_price', 'discounted_price',
+    )
     search_fields = ('product__name',)
-    list_filter = ('discount_type', 'product__category')
+    list_filter = ('discount_type', 'product__category', 'starts_at', 'ends_at')
     ordering = ('-value',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     def effective_discount(self, obj):
         """
@@ -90,15 +121,22 @@ class DiscountAdmin(admin.ModelAdmin):
         """
         return f"${obj.product.price:.2f}"
     product_price.short_description = 'Product Price'
+    product_price.admin_order_field = 'product__price'
 
     def discounted_price(self, obj):
         """
-        Display the final discounted price of the product.
+        Display the stored final price of the product, loaded with the discount row.
         """
-        final_price = Discount.calculate_final_price(obj.product)
+        final_price = obj.product.final_price
         return format_html(f'<span style="color: green;">${final_price:.2f}</span>')
     discounted_price.short_description = 'Discounted Price'
 
+    def get_queryset(self, request):
+        """
+        Load each row's product, with its stored final price, in the same query.
+        """
+        return super().get_queryset(request).select_related('product')
+
 
 ############################### REGISTER MODELS ###############################
 
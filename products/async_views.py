@@ -0,0 +1,152 @@
+"""
+Async (ASGI-native) read endpoints for the catalogue.
+
+They return the same envelopes and payloads as the DRF views in
+`products.views`, but are plain `async def` Django views that query through
+the async ORM (`aiterator`, `afirst`, `acount`) and serialize `.values()` rows,
+so nothing touches the database lazily from async code. Under ASGI the whole
+request stays on the event loop except for the individual queries, instead
+of running the full DRF view in `sync_to_async`. Responses are cached and
+answered with 304 exactly like the DRF views' (see `acache_response`).
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework import status
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from utils.cache_utils import acache_response
+from utils.pagination_utils import CustomPagination
+from .models import Category, Product
+from .serializers import (
+    CategoryTreeQuerySerializer, ProductListQuerySerializer, PRODUCT_ROW_FIELDS, represent_product_row,
+    serialize_category_tree,
+)
+from .views import listing_facets
+
+
+def json_response(payload, status_code=status.HTTP_200_OK):
+    """
+    Encode with the first configured DRF renderer, as the DRF views do for JSON clients.
+    """
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    return HttpResponse(renderer.render(payload), status=status_code, content_type=renderer.media_type)
+
+
+def error_json_response(message, validation_errors=None, status_code=status.HTTP_400_BAD_REQUEST):
+    """
+    Same format as `utils.response_utils.error_response`.
+    """
+    payload = {"status": status_code, "message": message}
+    if validation_errors is not None:
+        payload['errors'] = validation_errors
+    return json_response(payload, status_code)
+
+
+############################### CATEGORY API ###############################
+
+@require_GET
+@acache_response(lambda request: ['categories'])
+async def category_list(request):
+    """
+    Async equivalent of CategoryListView, including 'tree' and 'root_id'.
+    """
+    params = CategoryTreeQuerySerializer(data=request.GET)
+    if not params.is_valid():
+        return error_json_response("Invalid category parameters", validation_errors=params.errors)
+
+    categories = Category.objects.order_by('id')
+    root_id = params.validated_data.get('root_id')
+    if params.validated_data['tree'] and root_id is not None:
+        root_path = await Category.objects.filter(pk=root_id).values_list('path', flat=True).afirst()
+        categories = categories.filter(path__startswith=root_path) if root_path else categories.none()
+    rows = [row async for row in categories.values('id', 'name', 'description', 'parent_id').aiterator()]
+    data = serialize_category_tree(rows, roots_only=params.validated_data['tree'])
+    return json_response({"status": status.HTTP_200_OK, "message": "Categories retrieved successfully", "data": data})
+
+
+############################### PRODUCT API ###############################
+
+@require_GET
+@acache_response(lambda request: ['products'])
+async def product_list(request):
+    """
+    Async equivalent of ProductListView with page-number pagination, including 'facets'.
+    """
+    params = ProductListQuerySerializer(data=request.GET)
+    if not params.is_valid():
+        return error_json_response("Invalid product filters", validation_errors=params.errors)
+    if request.GET.get('pagination') == 'cursor':
+        return error_json_response(
+            "Invalid product filters",
+            validation_errors={'pagination': ["Cursor pagination is not available here; use /api/products/."]},
+        )
+    filters = dict(params.validated_data)
+    include_facets = filters.pop('facets')
+    listing_filters = dict(filters)
+
+    if filters.pop('include_descendants') and filters.get('category_id') is not None:
+        # Resolve the subtree's path asynchronously instead of inside filter_listing.
+        root_path = await Category.objects.filter(pk=filters.pop('category_id')).values_list('path', flat=True).afirst()
+        queryset = Product.objects.filter_listing(**filters)
+        queryset = queryset.filter(category__path__startswith=root_path) if root_path else queryset.none()
+    else:
+        queryset = Product.objects.filter_listing(**filters)
+
+    page_size = CustomPagination.page_size
+    try:
+        page_size = min(max(int(request.GET['page_size']), 1), CustomPagination.max_page_size)
+    except (KeyError, ValueError):
+        pass
+    try:
+        page_number = int(request.GET.get('page', 1))
+    except ValueError:
+        page_number = 0
+
+    count = await queryset.acount()
+    last_page = max((count + page_size - 1) // page_size, 1)
+    if not 1 <= page_number <= last_page:
+        return error_json_response("Invalid page.", status_code=status.HTTP_404_NOT_FOUND)
+
+    offset = (page_number - 1) * page_size
+    rows = queryset.values(*PRODUCT_ROW_FIELDS)[offset:offset + page_size]
+    data = represent_product_row.many([row async for row in rows.aiterator()])
+
+    url = request.build_absolute_uri()
+    next_link = replace_query_param(url, 'page', page_number + 1) if page_number < last_page else None
+    previous_link = None
+    if page_number == 2:
+        previous_link = remove_query_param(url, 'page')
+    elif page_number > 2:
+        previous_link = replace_query_param(url, 'page', page_number - 1)
+    payload = {
+        "status": status.HTTP_200_OK,
+        "message": "Products retrieved successfully",
+        "count": count,
+        "next": next_link,
+        "previous": previous_link,
+        "data": data,
+    }
+    if include_facets:
+        payload['facets'] = await sync_to_async(listing_facets)(listing_filters)
+    return json_response(payload)
+
+
+async def product_last_modified(request, product_id):
+    return await Product.objects.filter(pk=product_id).values_list('updated', flat=True).afirst()
+
+
+@require_GET
+@acache_response(lambda request, product_id: [f"product:{product_id}"], last_modified=product_last_modified)
+async def product_detail(request, product_id):
+    """
+    Async equivalent of ProductDetailView.
+    """
+    row = await Product.objects.filter(pk=product_id).values(*PRODUCT_ROW_FIELDS).afirst()
+    if row is None:
+        return error_json_response("No Product matches the given query.", status_code=status.HTTP_404_NOT_FOUND)
+    return json_response({
+        "status": status.HTTP_200_OK,
+        "message": "Product retrieved successfully",
+        "data": represent_product_row(row),
+    })
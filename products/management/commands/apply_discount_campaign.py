@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from products.serializers import DiscountCampaignSerializer
+
+
+class Command(BaseCommand):
+    """
+    Applies one discount to a set of products, as `POST /api/discounts/campaigns/` does.
+
+    Products are chosen by `--products` or by a category (with
+    `--include-descendants` for its whole subtree). Re-running a campaign key
+    skips the products that already hold its discount.
+    """
+    help = "Apply a discount campaign to products chosen by ID or category."
+
+    def add_arguments(self, parser):
+        parser.add_argument('campaign_key', help="Identifies the campaign; re-runs with the same key are idempotent.")
+        parser.add_argument('--type', dest='discount_type', required=True, choices=['PERCENTAGE', 'FIXED'])
+        parser.add_argument('--value', required=True, help="Percentage (1-100) or fixed amount.")
+        parser.add_argument('--starts-at', help="ISO 8601 start of the discount window.")
+        parser.add_argument('--ends-at', help="ISO 8601 end of the discount window.")
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--products', help="Comma-separated product IDs.")
+        target.add_argument('--category', type=int, help="Category ID.")
+        parser.add_argument('--include-descendants', action='store_true', help="Include the category's whole subtree.")
+
+    def handle(self, *args, **options):
+        data = {
+            'campaign_key': options['campaign_key'],
+            'discount_type': options['discount_type'],
+            'value': options['value'],
+            'starts_at': options['starts_at'],
+            'ends_at': options['ends_at'],
+        }
+        if options['products']:
+            data['product_ids'] = [product_id.strip() for product_id in options['products'].split(',') if product_id.strip()]
+        else:
+            data['filters'] = {'category_id': options['category'], 'include_descendants': options['include_descendants']}
+
+        serializer = DiscountCampaignSerializer(data=data)
+        if not serializer.is_valid():
+            raise CommandError(f"Invalid campaign: {serializer.errors}")
+        matched, created = serializer.apply()
+        self.stdout.write(self.style.SUCCESS(
+            f"Campaign {options['campaign_key']!r}: {created} discounts created, {matched - created} products already had it."
+        ))
@@ -0,0 +1,35 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db.models import Min
+from django.utils import timezone
+from products.models import Product
+
+
+class Command(BaseCommand):
+    """
+    Reprices the products whose discounts have started or ended since their final price was stored.
+
+    Reads use the stored `final_price`, so a discount window only takes effect
+    once this runs. Run it from cron every minute, or keep it running with
+    `--watch`, which sleeps until the next window boundary.
+    """
+    help = "Apply discounts whose validity window has opened or closed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--watch', action='store_true', help="Keep running and reprice at each window boundary.")
+        parser.add_argument('--max-sleep', type=float, default=60, help="Longest wait between checks with --watch, in seconds.")
+
+    def handle(self, *args, **options):
+        while True:
+            written = Product.objects.refresh_expired_final_prices()
+            if written or not options['watch']:
+                self.stdout.write(self.style.SUCCESS(f"Repriced {written} products."))
+            if not options['watch']:
+                return
+            time.sleep(self.seconds_until_next_boundary(options['max_sleep']))
+
+    def seconds_until_next_boundary(self, max_sleep):
+        boundary = Product.objects.aggregate(next=Min('final_price_valid_until'))['next']
+        if boundary is None:
+            return max_sleep
+        return min(max((boundary - timezone.now()).total_seconds(), 0.1), max_sleep)
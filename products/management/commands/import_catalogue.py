@@ -0,0 +1,252 @@
+import csv
+import hashlib
+import itertools
+import json
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import ValidationError
+from products.models import Category, Discount, Product
+from products.serializers import DiscountBulkItemSerializer, ProductBulkItemSerializer
+from utils.cache_utils import bump_versions
+
+
+class Command(BaseCommand):
+    """
+    Streams categories, products or discounts from a CSV or NDJSON file into the database.
+
+    Records flow through a generator pipeline (read -> resolve names -> validate)
+    and are written with bulk_create, one transaction per batch. After each
+    committed batch the number of records consumed is saved to a checkpoint
+    file, and a re-run with the same checkpoint skips straight past them.
+    Categories whose parent has not been seen yet are saved with it, so a
+    resumed import still links them. Every write is idempotent, so records
+    committed just before a crash and replayed by the resume are not
+    duplicated: categories and products are matched by name, and discounts
+    carry a campaign key derived from the file and record number.
+
+    Expected columns (categories and products are referenced by name):
+    - categories: name, description, parent
+    - products: name, description, price, stock_quantity, category
+    - discounts: product, discount_type, value, and optionally starts_at, ends_at
+    """
+    help = "Import categories, products or discounts from a large CSV or NDJSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=['categories', 'products', 'discounts'], help="Type of records in the file.")
+        parser.add_argument('path', help="Path to a .csv or .ndjson file.")
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help="File format; detected from the extension by default.")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Records written per transaction.")
+        parser.add_argument('--checkpoint', help="File recording progress; the import resumes from it when it exists.")
+
+    def handle(self, *args, **options):
+        path, kind = options['path'], options['kind']
+        file_format = options['format'] or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+        batch_size, checkpoint = options['batch_size'], options['checkpoint']
+        if not os.path.exists(path):
+            raise CommandError(f"File not found: {path}")
+
+        start, self.pending_parents = self.read_checkpoint(checkpoint, path, kind)
+        if start:
+            self.stdout.write(f"Resuming after {start} records.")
+        self.import_key = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:16]
+
+        write_batch = {
+            'categories': self.write_categories,
+            'products': self.write_products,
+            'discounts': self.write_discounts,
+        }[kind]
+        self.category_ids = dict(Category.objects.values_list('name', 'id'))  # Loaded once, kept current as we go
+        self.imported = self.skipped = self.existing = 0
+        started_at = time.monotonic()
+
+        with open(path, newline='', encoding='utf-8') as handle:
+            records = itertools.islice(self.read_records(handle, file_format), start, None)
+            position = start
+            while batch := list(itertools.islice(records, batch_size)):
+                with transaction.atomic():
+                    write_batch(batch)
+                position += len(batch)
+                self.write_checkpoint(checkpoint, path, kind, position, self.pending_parents)
+                rate = (self.imported + self.skipped + self.existing) / max(time.monotonic() - started_at, 1e-9)
+                self.stdout.write(
+                    f"{position} records read, {self.imported} imported, {self.skipped} skipped, "
+                    f"{self.existing} already imported ({rate:,.0f} rows/s)"
+                )
+
+        if kind == 'categories':
+            for name, parent in self.pending_parents:
+                self.stderr.write(f"Category {name!r}: unknown parent {parent!r}")
+            Category.objects.rebuild_paths()
+        bump_versions('categories', 'products')
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {self.imported} {kind}, skipped {self.skipped}, {self.existing} already imported."
+        ))
+
+    ############################### READING ###############################
+
+    def read_records(self, handle, file_format):
+        """
+        Yield `(record_number, record)` pairs without loading the file.
+        """
+        if file_format == 'csv':
+            yield from enumerate(csv.DictReader(handle), start=1)
+            return
+        number = 0
+        for line in handle:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                record = {'__error__': f"Invalid JSON: {exc}"}
+            if not isinstance(record, dict):
+                record = {'__error__': "Expected a JSON object."}
+            yield number, record
+
+    def validate(self, batch, serializer, resolve):
+        """
+        Resolve names to IDs and validate each record, reporting and skipping bad ones.
+
+        Yields `(record_number, validated_data)` pairs.
+        """
+        for number, record in batch:
+            try:
+                if '__error__' in record:
+                    raise ValidationError(record['__error__'])
+                yield number, serializer.run_validation(resolve(record))
+            except ValidationError as exc:
+                self.skipped += 1
+                self.stderr.write(f"Record {number}: {exc.detail}")
+
+    ############################### WRITING ###############################
+
+    def write_categories(self, batch):
+        rows, batch_names = [], set()
+        for number, record in batch:
+            if '__error__' in record:
+                self.skipped += 1
+                self.stderr.write(f"Record {number}: {record['__error__']}")
+                continue
+            name = str(record.get('name') or '').strip()
+            if not name or name in self.category_ids or name in batch_names:
+                self.skipped += 1
+                self.stderr.write(f"Record {number}: missing or duplicate category name {name!r}")
+                continue
+            batch_names.add(name)
+            rows.append((number, name, record.get('description') or None, str(record.get('parent') or '').strip()))
+
+        try:
+            with transaction.atomic():
+                created = Category.objects.bulk_create([Category(name=name, description=description) for _, name, description, _ in rows])
+        except IntegrityError:
+            # A name was taken since the names were loaded; insert row by row to report just those.
+            created = []
+            for number, name, description, _ in rows:
+                try:
+                    with transaction.atomic():
+                        created.append(Category.objects.create(name=name, description=description))
+                except IntegrityError:
+                    self.skipped += 1
+                    self.stderr.write(f"Record {number}: duplicate category name {name!r}")
+        self.category_ids.update((category.name, category.id) for category in created)
+        created_names = {category.name for category in created}
+        self.pending_parents.extend((name, parent) for _, name, _, parent in rows if parent and name in created_names)
+        self.link_parents()
+        self.imported += len(created)
+
+    def link_parents(self):
+        """
+        Set the parents that are known by now; the rest wait for a later batch.
+
+        Parents are linked after the insert, so a file may list children
+        before their parents.
+        """
+        linked = [
+            Category(id=self.category_ids[name], parent_id=self.category_ids[parent])
+            for name, parent in self.pending_parents if parent in self.category_ids
+        ]
+        self.pending_parents = [(name, parent) for name, parent in self.pending_parents if parent not in self.category_ids]
+        Category.objects.bulk_update(linked, ['parent'], batch_size=1000)
+
+    def write_products(self, batch):
+        def resolve(record):
+            category = str(record.get('category') or '').strip()
+            if category not in self.category_ids:
+                raise ValidationError({'category': [f"Unknown category {category!r}."]})
+            return dict(record, category=self.category_ids[category])
+
+        valid = [data for _, data in self.validate(batch, ProductBulkItemSerializer(), resolve)]
+        existing = set(Product.objects.filter(name__in=[data['name'] for data in valid]).values_list('name', flat=True))
+        products = []
+        for data in valid:
+            if data['name'] in existing:
+                self.skipped += 1
+                self.stderr.write(f"Product {data['name']!r} already exists")
+                continue
+            existing.add(data['name'])
+            products.append(Product(
+                name=data['name'],
+                description=data['description'],
+                price=data['price'],
+                stock_quantity=data['stock_quantity'],
+                category_id=data['category'],
+            ))
+        Product.objects.bulk_create(products)
+        self.imported += len(products)
+
+    def write_discounts(self, batch):
+        names = {str(record.get('product') or '').strip() for _, record in batch}
+        product_ids = dict(Product.objects.filter(name__in=names).values_list('name', 'id'))
+
+        def resolve(record):
+            product = str(record.get('product') or '').strip()
+            if product not in product_ids:
+                raise ValidationError({'product': [f"Unknown product {product!r}."]})
+            # Empty CSV cells leave the window open on that side.
+            window = {field: record.get(field) or None for field in ('starts_at', 'ends_at')}
+            return dict(record, product=product_ids[product], **window)
+
+        discounts = [
+            Discount(
+                product_id=data['product'], discount_type=data['discount_type'], value=data['value'],
+                starts_at=data['starts_at'], ends_at=data['ends_at'],
+                # Unique per product, so replaying a record after a crash inserts nothing.
+                campaign_key=f"import:{self.import_key}:{number}",
+            )
+            for number, data in self.validate(batch, DiscountBulkItemSerializer(), resolve)
+        ]
+        # ignore_conflicts doesn't say which rows it skipped, so count the batch's keys around the insert.
+        keys = Discount.objects.filter(campaign_key__in=[discount.campaign_key for discount in discounts])
+        before = keys.count()
+        # DiscountQuerySet.bulk_create refreshes the affected products' final prices.
+        Discount.objects.bulk_create(discounts, ignore_conflicts=True)
+        inserted = keys.count() - before
+        self.imported += inserted
+        self.existing += len(discounts) - inserted
+
+    ############################### CHECKPOINTS ###############################
+
+    def read_checkpoint(self, checkpoint, path, kind):
+        """
+        Return the number of records already imported and the `(name, parent)` links still pending.
+        """
+        if not checkpoint or not os.path.exists(checkpoint):
+            return 0, []
+        with open(checkpoint, encoding='utf-8') as handle:
+            state = json.load(handle)
+        if state.get('path') != os.path.abspath(path) or state.get('kind') != kind:
+            raise CommandError(f"Checkpoint {checkpoint} belongs to a different import.")
+        return state['position'], [tuple(link) for link in state.get('pending_parents', [])]
+
+    def write_checkpoint(self, checkpoint, path, kind, position, pending_parents):
+        if not checkpoint:
+            return
+        temporary = f"{checkpoint}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as handle:
+            json.dump({
+                'path': os.path.abspath(path), 'kind': kind, 'position': position, 'pending_parents': pending_parents,
+            }, handle)
+        os.replace(temporary, checkpoint)  # Atomic, so a crash never leaves a half-written checkpoint
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+from products.models import Product
+from utils.cache_utils import invalidate_products
+
+
+class Command(BaseCommand):
+    """
+    Recomputes the stored final price of every product in primary-key batches.
+
+    The cached responses of the products whose price changed are evicted.
+    """
+    help = "Rebuild Product.final_price from the current discounts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000, help="Number of product IDs updated per query.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        bounds = Product.objects.aggregate(low=Min('id'), high=Max('id'))
+        if bounds['low'] is None:
+            self.stdout.write("No products to rebuild.")
+            return
+
+        updated = 0
+        for start in range(bounds['low'], bounds['high'] + 1, batch_size):
+            batch = Product.objects.filter(id__gte=start, id__lt=start + batch_size)
+            product_ids = list(batch.stale_final_prices().values_list('pk', flat=True))
+            if product_ids:
+                updated += Product.objects.filter(pk__in=product_ids).refresh_final_prices()
+                invalidate_products(product_ids)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt final prices; {updated} products changed."))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from products.models import StockReservation
+
+
+class Command(BaseCommand):
+    """
+    Returns the stock of held reservations whose hold has expired.
+
+    Reservations are also released lazily when a buyer runs short of stock,
+    so this only keeps the visible stock counts current; run it every minute
+    or so from cron. Concurrent runs skip each other's rows.
+    """
+    help = "Release expired stock reservations."
+
+    def handle(self, *args, **options):
+        released = StockReservation.objects.release_expired()
+        self.stdout.write(self.style.SUCCESS(f"Released {released} expired reservations."))
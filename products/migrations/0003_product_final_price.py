@@ -0,0 +1,49 @@
+# Generated by Django 5.1.4 on 2026-10-18 09:12
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Case, F, Max, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
+
+
+def populate_final_price(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    Discount = apps.get_model('products', 'Discount')
+    price_field = models.DecimalField(max_digits=10, decimal_places=2)
+    discount_amount = Case(
+        When(discount_type='FIXED', then=F('value')),
+        default=OuterRef('price') * F('value') * Value(Decimal('0.01')),  # Not `/ 100`, an integer division on SQLite
+        output_field=price_field,
+    )
+    best_discount = (
+        Discount.objects.filter(product=OuterRef('pk'))
+        .values('product')
+        .annotate(amount=Max(discount_amount))
+        .values('amount')
+    )
+    Product.objects.update(final_price=Greatest(
+        F('price') - Coalesce(Subquery(best_discount, output_field=price_field), Value(0), output_field=price_field),
+        Value(0),
+        output_field=price_field,
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_alter_category_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='final_price',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10),
+            preserve_default=False,
+        ),
+        migrations.RunPython(populate_final_price, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['final_price'], name='products_pr_final_p_ce3ee3_idx'),
+        ),
+    ]
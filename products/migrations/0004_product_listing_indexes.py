@@ -0,0 +1,41 @@
+# Generated by Django 5.1.4 on 2026-10-18 05:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_product_final_price'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', 'price', 'id'], name='products_pr_categor_12fcd0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', 'final_price', 'id'], name='products_pr_categor_8ef02a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', 'created', 'id'], name='products_pr_categor_4e49d8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', 'stock_quantity', 'id'], name='products_pr_categor_42b15c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['price', 'id'], name='products_pr_price_dbec84_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['created', 'id'], name='products_pr_created_3596bb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['stock_quantity', 'id'], name='products_pr_stock_q_8aa71e_idx'),
+        ),
+    ]
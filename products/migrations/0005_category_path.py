@@ -0,0 +1,35 @@
+# Generated by Django 5.1.4 on 2026-10-18 05:45
+
+from django.db import migrations, models
+
+
+def populate_paths(apps, schema_editor):
+    Category = apps.get_model('products', 'Category')
+    categories = list(Category.objects.only('id', 'parent_id'))
+    children = {}
+    for category in categories:
+        children.setdefault(category.parent_id, []).append(category)
+
+    # Walk down from the roots so every parent path is known before its children.
+    pending = [(category, '/') for category in children.get(None, [])]
+    while pending:
+        category, parent_path = pending.pop()
+        category.path = f'{parent_path}{category.id}/'
+        pending.extend((child, category.path) for child in children.get(category.id, []))
+    Category.objects.bulk_update(categories, ['path'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_product_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=1024),
+        ),
+        migrations.RunPython(populate_paths, migrations.RunPython.noop),
+    ]
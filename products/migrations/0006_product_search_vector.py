@@ -0,0 +1,54 @@
+# Generated by Django 5.1.4 on 2026-10-18 05:50
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+# GIN indexes only exist on PostgreSQL, so they are created here rather than
+# declared in Product.Meta, where other backends would try to build them.
+SEARCH_INDEXES = [
+    ('products_pr_search_gin_idx', 'USING gin (search_vector)'),
+    ('products_pr_name_trgm_idx', 'USING gin (name gin_trgm_ops)'),
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Product = apps.get_model('products', 'Product')
+    Category = apps.get_model('products', 'Category')
+    category_name = Subquery(Category.objects.filter(pk=OuterRef('category_id')).values('name')[:1])
+    Product.objects.update(search_vector=(
+        SearchVector('name', weight='A', config=settings.SEARCH_CONFIG)
+        + SearchVector('description', weight='B', config=settings.SEARCH_CONFIG)
+        + SearchVector(category_name, weight='C', config=settings.SEARCH_CONFIG)
+    ))
+    for name, definition in SEARCH_INDEXES:
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON products_product {definition}')
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_category_path'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.4 on 2026-10-18 05:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='discount',
+            name='updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.4 on 2026-10-18 06:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_modification_timestamps'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reference', models.UUIDField(db_index=True, editable=False)),
+                ('quantity', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('HELD', 'Held'), ('RELEASED', 'Released'), ('COMMITTED', 'Committed')], default='HELD', max_length=20)),
+                ('expires_at', models.DateTimeField()),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_reservations', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'expires_at'], name='products_st_status_657db7_idx')],
+            },
+        ),
+    ]
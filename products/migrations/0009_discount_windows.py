@@ -0,0 +1,32 @@
+# Generated by Django 5.1.4 on 2026-10-18 06:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_stock_reservation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='discount',
+            name='ends_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='discount',
+            name='starts_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='final_price_valid_until',
+            field=models.DateTimeField(db_index=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='discount',
+            index=models.Index(fields=['product', 'starts_at', 'ends_at'], name='products_di_product_013853_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.4 on 2026-10-18 06:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_discount_windows'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='discount',
+            name='campaign_key',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='discount',
+            constraint=models.UniqueConstraint(fields=('campaign_key', 'product'), name='unique_campaign_discount'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.4 on 2026-10-18 06:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_discount_campaigns'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='products_pr_final_p_ce3ee3_idx',
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['final_price', 'id'], name='products_pr_final_p_cc2cba_idx'),
+        ),
+    ]
@@ -1,13 +1,86 @@
-from django.db import models
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, SearchVectorField, TrigramSimilarity
+from django.core.exceptions import ValidationError
+from django.db import connections, models, transaction
+from django.db.models import Case, Count, DecimalField, F, FloatField, Max, Min, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Cast, Coalesce, Concat, Greatest, Now, Substr
+from django.db.models.lookups import Exact
+from django.utils import timezone
+from utils.cache_utils import invalidate_products
+
+
+class CategoryQuerySet(models.QuerySet):
+    def subtree(self, root_id):
+        """
+        Restricts the queryset to a category and all of its descendants.
+
+        The root's materialized path is looked up by primary key, after which
+        the whole subtree is a single indexed prefix match on `path`.
+        """
+        root_path = Category.objects.filter(pk=root_id).values_list('path', flat=True).first()
+        if not root_path:
+            return self.none()
+        return self.filter(path__startswith=root_path)
+
+    def rebuild_paths(self):
+        """
+        Recomputes the materialized path of every category, e.g. after bulk writes that bypass save().
+        """
+        categories = list(Category.objects.only('id', 'parent_id', 'path'))
+        children = {}
+        for category in categories:
+            children.setdefault(category.parent_id, []).append(category)
+
+        # Walk down from the roots so every parent path is known before its children.
+        pending = [(category, '/') for category in children.get(None, [])]
+        while pending:
+            category, parent_path = pending.pop()
+            category.path = f'{parent_path}{category.id}/'
+            pending.extend((child, category.path) for child in children.get(category.id, []))
+        Category.objects.bulk_update(categories, ['path'], batch_size=1000)
+
 
 class Category(models.Model):
     name = models.CharField(max_length=255, unique=True)
     description = models.TextField(blank=True, null=True)
     parent = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='subcategories')
+    # Materialized path of ancestor IDs ending with this category's own, e.g. "/1/5/12/".
+    # db_index also creates the LIKE-prefix (pattern_ops) index on PostgreSQL.
+    path = models.CharField(max_length=1024, db_index=True, editable=False, default='')
+    updated = models.DateTimeField(auto_now=True)
+
+    objects = CategoryQuerySet.as_manager()
 
     def __str__(self):
         return self.name
 
+    def clean(self):
+        if self.path and self.parent_id and self.parent.path.startswith(self.path):
+            raise ValidationError({'parent': "A category cannot be moved under itself or one of its subcategories."})
+
+    def save(self, *args, **kwargs):
+        parent_path = '/'
+        if self.parent_id:
+            parent_path = Category.objects.filter(pk=self.parent_id).values_list('path', flat=True).get()
+        if self.path and parent_path.startswith(self.path):
+            raise ValueError("A category cannot be moved under itself or one of its subcategories.")
+        super().save(*args, **kwargs)
+
+        new_path = f'{parent_path}{self.pk}/'
+        if new_path == self.path:
+            return
+        if self.path:
+            # Moved: rewrite the prefix of this category and every descendant in one UPDATE.
+            Category.objects.filter(path__startswith=self.path).update(
+                path=Concat(Value(new_path), Substr('path', len(self.path) + 1), output_field=models.CharField())
+            )
+        else:
+            Category.objects.filter(pk=self.pk).update(path=new_path)
+        self.path = new_path
+
     class Meta:
         verbose_name_plural = "Categories"
         indexes = [
@@ -15,6 +88,173 @@ class Category(models.Model):
         ]
 
 
+class ProductQuerySet(models.QuerySet):
+    ORDERING_FIELDS = ('price', 'final_price', 'created', 'stock_quantity')
+
+    def filter_listing(self, category_id=None, include_descendants=False, min_price=None, max_price=None,
+                       in_stock=None, ordering=None):
+        """
+        Applies the product list filters and a deterministic ordering.
+
+        With `include_descendants`, `category_id` matches its whole subtree
+        through the categories' indexed materialized path.
+
+        Price bounds apply to the stored `final_price`, the price a shopper pays.
+        `ordering` is one of `ORDERING_FIELDS`, optionally prefixed with `-`;
+        `id` breaks ties so every ordering is served by a (category, field, id)
+        or (field, id) index.
+        """
+        queryset = self
+        if category_id is not None and include_descendants:
+            queryset = queryset.filter(category__in=Category.objects.subtree(category_id))
+        elif category_id is not None:
+            queryset = queryset.filter(category_id=category_id)
+        if min_price is not None:
+            queryset = queryset.filter(final_price__gte=min_price)
+        if max_price is not None:
+            queryset = queryset.filter(final_price__lte=max_price)
+        if in_stock is not None:
+            queryset = queryset.filter(stock_quantity__gt=0) if in_stock else queryset.filter(stock_quantity=0)
+        if not ordering:
+            return queryset.order_by('id')
+        descending = ordering.startswith('-')
+        return queryset.order_by(ordering, '-id' if descending else 'id')
+
+    def facet_counts(self, price_edges):
+        """
+        Counts the queryset's products per category, final-price bucket and stock state in one query.
+
+        `price_edges` are ascending bucket boundaries; with edges [0, 50, 100]
+        the buckets are [0, 50), [50, 100) and [100, +inf). The query groups by
+        category and counts the other facets with conditional aggregates, and
+        the per-category rows are then summed here.
+        """
+        buckets = list(zip(price_edges, [*price_edges[1:], None]))
+        aggregates = {'total': Count('id'), 'in_stock': Count('id', filter=Q(stock_quantity__gt=0))}
+        for index, (low, high) in enumerate(buckets):
+            condition = Q(final_price__gte=low) if high is None else Q(final_price__gte=low, final_price__lt=high)
+            aggregates[f'price_{index}'] = Count('id', filter=condition)
+        rows = list(self.order_by().values('category_id').annotate(**aggregates).order_by('category_id'))
+
+        in_stock = sum(row['in_stock'] for row in rows)
+        return {
+            'categories': [{'category': row['category_id'], 'count': row['total']} for row in rows],
+            'price': [
+                {'min': low, 'max': high, 'count': sum(row[f'price_{index}'] for row in rows)}
+                for index, (low, high) in enumerate(buckets)
+            ],
+            'in_stock': {'true': in_stock, 'false': sum(row['total'] for row in rows) - in_stock},
+        }
+
+    def refresh_final_prices(self):
+        """
+        Recomputes the stored `final_price` and `final_price_valid_until` of every product in the queryset in one UPDATE.
+
+        Only products where either changes are written, and `updated` is only
+        bumped when the price itself changes. Returns the number of products written.
+        """
+        final_price, valid_until = final_price_expression(), price_valid_until_expression()
+        return self.stale_final_prices().update(
+            final_price=final_price,
+            final_price_valid_until=valid_until,
+            updated=Case(When(final_price=final_price, then=F('updated')), default=Now()),
+        )
+
+    def stale_final_prices(self):
+        """
+        The products in the queryset whose stored `final_price` or `final_price_valid_until` is out of date.
+        """
+        final_price, valid_until = final_price_expression(), price_valid_until_expression()
+        never = Value(datetime.max.replace(tzinfo=dt_timezone.utc))  # NULL-safe comparison of the validity
+        return self.exclude(
+            Exact(Coalesce('final_price_valid_until', never), Coalesce(valid_until, never)), final_price=final_price
+        )
+
+    def refresh_expired_final_prices(self):
+        """
+        Reprices the products whose stored final price has passed a discount window boundary.
+
+        Their cached responses are evicted. Returns the number of products written.
+        """
+        product_ids = list(self.filter(final_price_valid_until__lte=Now()).values_list('pk', flat=True))
+        if not product_ids:
+            return 0
+        written = self.filter(pk__in=product_ids).refresh_final_prices()
+        invalidate_products(product_ids)
+        return written
+
+    def search(self, query):
+        """
+        Matches products against a search phrase and annotates their relevance as `rank`.
+
+        On PostgreSQL this uses the GIN-indexed, weighted `search_vector`
+        (name, then description, then category name) together with trigram
+        similarity on the name, which also catches misspellings. Other
+        backends fall back to unranked `icontains` matching.
+        """
+        if connections[self.db].vendor != 'postgresql':
+            return self.filter(
+                Q(name__icontains=query) | Q(description__icontains=query) | Q(category__name__icontains=query)
+            ).annotate(rank=Value(0.0, output_field=FloatField()))
+        search_query = SearchQuery(query, search_type='websearch', config=settings.SEARCH_CONFIG)
+        # Double precision, so the rank round-trips exactly through keyset cursors; compared with
+        # a float8 cursor value, the real (float4) SearchRank would almost never be equal.
+        return self.filter(Q(search_vector=search_query) | Q(name__trigram_similar=query)).annotate(
+            rank=Cast(SearchRank(F('search_vector'), search_query) + TrigramSimilarity('name', query), FloatField())
+        )
+
+    def refresh_search_vectors(self):
+        """
+        Recomputes the stored `search_vector` of every product in the queryset in one UPDATE.
+
+        A no-op, returning 0, on backends other than PostgreSQL.
+        """
+        if connections[self.db].vendor != 'postgresql':
+            return 0
+        category_name = Subquery(Category.objects.filter(pk=OuterRef('category_id')).values('name')[:1])
+        return self.update(search_vector=(
+            SearchVector('name', weight='A', config=settings.SEARCH_CONFIG)
+            + SearchVector('description', weight='B', config=settings.SEARCH_CONFIG)
+            + SearchVector(category_name, weight='C', config=settings.SEARCH_CONFIG)
+        ))
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Seeds `final_price` from `price`, since new products have no discounts yet,
+        indexes the new products for search and evicts the cached responses that
+        listed their IDs as missing.
+        """
+        for obj in objs:
+            if obj.final_price is None:
+                obj.final_price = obj.price
+        created = super().bulk_create(objs, *args, **kwargs)
+        product_ids = [obj.pk for obj in created if obj.pk]
+        self.filter(pk__in=product_ids).refresh_search_vectors()
+        invalidate_products(product_ids)
+        return created
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        """
+        Keeps `updated` and the derived `final_price` and `search_vector` columns in step with the updated fields.
+        """
+        now = timezone.now()
+        for obj in objs:
+            obj.updated = now  # bulk_update() skips auto_now
+        rows = super().bulk_update(objs, [*fields, 'updated'], *args, **kwargs)
+        updated = self.filter(pk__in=[obj.pk for obj in objs])
+        if 'price' in fields:
+            updated.refresh_final_prices()
+        if {'name', 'description', 'category'} & set(fields):
+            updated.refresh_search_vectors()
+        return rows
+
+
+class ProductManager(models.Manager.from_queryset(ProductQuerySet)):
+    def get_queryset(self):
+        # The search document is only used inside SQL; don't ship it with every row.
+        return super().get_queryset().defer('search_vector')
+
+
 class Product(models.Model):
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='products')
     name = models.CharField(max_length=255)
@@ -22,16 +262,106 @@ class Product(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     stock_quantity = models.PositiveIntegerField()
     created = models.DateTimeField(auto_now_add=True)
+    # Last change to anything in the product's representation, including its final price.
+    updated = models.DateTimeField(auto_now=True)
+    # Price after the highest discount, maintained on Discount writes (see products.signals).
+    final_price = models.DecimalField(max_digits=10, decimal_places=2, editable=False)
+    # When a discount window next opens or closes and final_price must be recomputed (see refresh_expired_final_prices).
+    final_price_valid_until = models.DateTimeField(null=True, editable=False, db_index=True)
+    # Weighted full-text document, maintained by ProductQuerySet.refresh_search_vectors on PostgreSQL.
+    # Its GIN index, and the trigram index on name, are created by migration 0006 on PostgreSQL only.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = ProductManager()
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        if adding or self.final_price is None:
+            self.final_price = self.price
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if not adding and (update_fields is None or 'price' in update_fields):
+            # The price changed under existing discounts, so re-apply them.
+            Product.objects.filter(pk=self.pk).refresh_final_prices()
+            self.refresh_from_db(fields=['final_price'])
+        if update_fields is None or {'name', 'description', 'category'} & set(update_fields):
+            Product.objects.filter(pk=self.pk).refresh_search_vectors()
+
     class Meta:
         indexes = [
             models.Index(fields=['category']),  # Index for category field
+            # Composite indexes serving each list ordering, with and without a category filter
+            models.Index(fields=['category', 'price', 'id']),
+            models.Index(fields=['category', 'final_price', 'id']),
+            models.Index(fields=['category', 'created', 'id']),
+            models.Index(fields=['category', 'stock_quantity', 'id']),
+            models.Index(fields=['price', 'id']),
+            models.Index(fields=['final_price', 'id']),  # Also serves the final-price range filters
+            models.Index(fields=['created', 'id']),
+            models.Index(fields=['stock_quantity', 'id']),
         ]
 
 
+class DiscountQuerySet(models.QuerySet):
+    """
+    Keeps `Product.final_price` current for writes that bypass model signals.
+    """
+
+    def active(self):
+        """
+        Restricts the queryset to discounts whose window contains the database's current time.
+        """
+        return self.filter(Q(starts_at__isnull=True) | Q(starts_at__lte=Now()), Q(ends_at__isnull=True) | Q(ends_at__gt=Now()))
+
+    def apply_campaign(self, campaign_key, products, **terms):
+        """
+        Gives every product in `products` one discount with the given terms, tagged with `campaign_key`.
+
+        Products that already hold the campaign's discount are skipped, so
+        re-running a campaign is safe and only picks up products that have
+        since matched. The discounts are inserted in batches and the products'
+        final prices refreshed in one UPDATE, all in one transaction.
+        Returns `(matched, created)` product counts.
+        """
+        with transaction.atomic():
+            product_ids = list(products.order_by().values_list('pk', flat=True))
+            applied = set(self.filter(campaign_key=campaign_key).values_list('product_id', flat=True))
+            discounts = [
+                Discount(product_id=product_id, campaign_key=campaign_key, **terms)
+                for product_id in product_ids if product_id not in applied
+            ]
+            # Conflicts only arise from a concurrent run of the same campaign, which already created those rows.
+            super().bulk_create(discounts, batch_size=1000, ignore_conflicts=True)
+            if discounts:
+                campaign_products = self.filter(campaign_key=campaign_key).values('product_id')
+                Product.objects.filter(pk__in=campaign_products).refresh_final_prices()
+                invalidate_products([discount.product_id for discount in discounts])
+        return len(product_ids), len(discounts)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        created = super().bulk_create(objs, *args, **kwargs)
+        product_ids = {discount.product_id for discount in created}
+        Product.objects.filter(pk__in=product_ids).refresh_final_prices()
+        invalidate_products(product_ids)
+        return created
+
+    def update(self, **kwargs):
+        discounts = list(self.values_list('pk', 'product_id'))
+        kwargs.setdefault('updated', Now())
+        rows = super().update(**kwargs)
+        product_ids = {product_id for _, product_id in discounts}
+        if 'product' in kwargs or 'product_id' in kwargs:
+            product_ids.update(
+                Discount.objects.filter(pk__in=[pk for pk, _ in discounts]).values_list('product_id', flat=True)
+            )
+        Product.objects.filter(pk__in=product_ids).refresh_final_prices()
+        invalidate_products(product_ids)
+        return rows
+
+
 class Discount(models.Model):
     PERCENTAGE = 'PERCENTAGE'
     FIXED = 'FIXED'
@@ -43,20 +373,210 @@ class Discount(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='discounts')
     discount_type = models.CharField(max_length=20, choices=DISCOUNT_TYPE_CHOICES)
     value = models.DecimalField(max_digits=10, decimal_places=2)
+    # Optional validity window; an open end means no limit on that side.
+    starts_at = models.DateTimeField(null=True, blank=True)
+    ends_at = models.DateTimeField(null=True, blank=True)
+    # Set on discounts created by DiscountQuerySet.apply_campaign; a campaign gives each product at most one discount.
+    campaign_key = models.CharField(max_length=100, null=True, blank=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    objects = DiscountQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.discount_type} - {self.value}"
 
+    class Meta:
+        indexes = [
+            # Serves the active-window lookups of final_price_expression and price_valid_until_expression
+            models.Index(fields=['product', 'starts_at', 'ends_at']),
+        ]
+        constraints = [
+            # Campaign key first, so the constraint's index also finds a campaign's discounts.
+            models.UniqueConstraint(fields=['campaign_key', 'product'], name='unique_campaign_discount'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded product so a reassigned discount also reprices its old product.
+        instance._loaded_product_id = instance.__dict__.get('product_id')
+        return instance
+
+    def clean(self):
+        if self.starts_at and self.ends_at and self.ends_at <= self.starts_at:
+            raise ValidationError({'ends_at': "A discount must end after it starts."})
+
+
+class InsufficientStock(Exception):
+    """
+    Raised when a reservation asks for more units than are in stock.
+    """
+
+    def __init__(self, product_ids):
+        self.product_ids = sorted(product_ids)
+        super().__init__(f"Insufficient stock for products {self.product_ids}")
+
+
+class StockReservationQuerySet(models.QuerySet):
+    def reserve(self, quantities, ttl):
+        """
+        Holds stock for a cart, given as `{product_id: quantity}`, for `ttl` seconds.
+
+        Each product is decremented by one guarded `UPDATE ... SET stock =
+        stock - n WHERE stock >= n`, so concurrent buyers can never take the
+        count below zero. Products are locked in primary-key order, which
+        rules out deadlocks between carts, and the whole cart is one
+        transaction: if any product is short, expired holds on the short
+        products are released and they are tried once more, after which
+        nothing is reserved and `InsufficientStock` is raised.
+
+        Returns the created reservations, which share one `reference`.
+        """
+        reference = uuid.uuid4()
+        expires_at = timezone.now() + timedelta(seconds=ttl)
+        for attempt in range(2):
+            try:
+                with transaction.atomic():
+                    short = self.take_stock(quantities)
+                    if short:
+                        raise InsufficientStock(short)  # Rolls back what was taken for the rest of the cart
+                    reservations = self.bulk_create([
+                        StockReservation(reference=reference, product_id=product_id, quantity=quantity, expires_at=expires_at)
+                        for product_id, quantity in sorted(quantities.items())
+                    ])
+                break
+            except InsufficientStock as exc:
+                # Expired holds may be keeping the stock; free them and try once more.
+                if attempt or not StockReservation.objects.filter(product_id__in=exc.product_ids).release_expired():
+                    raise
+        invalidate_products(quantities)
+        return reservations
+
     @staticmethod
-    def calculate_final_price(product):
-        """Applies the highest discount to the product."""
-        discounts = product.discounts.all()
-        if not discounts.exists():
-            return product.price
-        max_discount = max(
-            discounts, 
-            key=lambda d: d.value if d.discount_type == Discount.FIXED else (product.price * d.value / 100)
-        )
-        if max_discount.discount_type == Discount.FIXED:
-            return max(product.price - max_discount.value, 0)
-        return max(product.price * (1 - max_discount.value / 100), 0)
+    def take_stock(quantities):
+        """
+        Decrements each product's stock if it covers the quantity; returns the IDs that fell short.
+        """
+        short = []
+        for product_id, quantity in sorted(quantities.items()):
+            taken = Product.objects.filter(pk=product_id, stock_quantity__gte=quantity).update(
+                stock_quantity=F('stock_quantity') - quantity, updated=Now()
+            )
+            if not taken:
+                short.append(product_id)
+        return short
+
+    def release(self):
+        """
+        Returns the stock of the held reservations in the queryset and marks them released.
+
+        Rows are claimed with `SELECT ... FOR UPDATE SKIP LOCKED` (where the
+        database supports it) and a guarded per-row status change, so a
+        reservation released by two callers at once, such as a client and the
+        expiry sweep, restocks only once. Returns the number released.
+        """
+        restock, released = {}, 0
+        with transaction.atomic():
+            held = self.filter(status=StockReservation.HELD).select_for_update(skip_locked=True)
+            for pk, product_id, quantity in held.values_list('pk', 'product_id', 'quantity'):
+                if StockReservation.objects.filter(pk=pk, status=StockReservation.HELD).update(status=StockReservation.RELEASED):
+                    restock[product_id] = restock.get(product_id, 0) + quantity
+                    released += 1
+            for product_id, quantity in sorted(restock.items()):
+                Product.objects.filter(pk=product_id).update(stock_quantity=F('stock_quantity') + quantity, updated=Now())
+        invalidate_products(restock)
+        return released
+
+    def release_expired(self):
+        """
+        Releases the held reservations in the queryset whose hold has run out.
+        """
+        return self.filter(expires_at__lte=timezone.now()).release()
+
+    def commit(self):
+        """
+        Turns the queryset's unexpired held reservations into sales; their stock stays taken.
+
+        Returns the number of reservations committed.
+        """
+        return self.filter(status=StockReservation.HELD, expires_at__gt=timezone.now()).update(status=StockReservation.COMMITTED)
+
+
+class StockReservation(models.Model):
+    HELD = 'HELD'
+    RELEASED = 'RELEASED'
+    COMMITTED = 'COMMITTED'
+    STATUS_CHOICES = [
+        (HELD, 'Held'),
+        (RELEASED, 'Released'),
+        (COMMITTED, 'Committed'),
+    ]
+
+    # Shared by the reservations of one cart; clients release or commit by it.
+    reference = models.UUIDField(db_index=True, editable=False)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_reservations')
+    quantity = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=HELD)
+    expires_at = models.DateTimeField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    objects = StockReservationQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product_id} ({self.status})"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),  # Expiry sweeps
+        ]
+
+
+def final_price_expression():
+    """
+    Builds the SQL expression for a product's price after its highest active discount.
+
+    A fixed discount is worth its value and a percentage discount is worth
+    `price * value / 100`; the largest one whose window contains the current
+    time is subtracted and the result is floored at zero. It is the only
+    pricing rule: `Product.final_price` stores its result.
+    """
+    price_field = DecimalField(max_digits=10, decimal_places=2)
+    discount_amount = Case(
+        When(discount_type=Discount.FIXED, then=F('value')),
+        default=OuterRef('price') * F('value') * Value(Decimal('0.01')),  # Not `/ 100`, an integer division on SQLite
+        output_field=price_field,
+    )
+    best_discount = (
+        Discount.objects.active().filter(product=OuterRef('pk'))
+        .values('product')
+        .annotate(amount=Max(discount_amount))
+        .values('amount')
+    )
+    return Greatest(
+        F('price') - Coalesce(Subquery(best_discount, output_field=price_field), Value(0), output_field=price_field),
+        Value(0),
+        output_field=price_field,
+    )
+
+
+def price_valid_until_expression():
+    """
+    Builds the SQL expression for the next time one of a product's discounts starts or ends.
+
+    Until then `final_price_expression` gives the same result, so the stored
+    price only needs recomputing once this time has passed. NULL when no
+    window boundary lies ahead.
+    """
+    next_boundary = Case(
+        When(starts_at__gt=Now(), then=F('starts_at')),
+        When(ends_at__gt=Now(), then=F('ends_at')),
+        output_field=models.DateTimeField(),
+    )
+    upcoming = (
+        Discount.objects.filter(product=OuterRef('pk'))
+        .filter(Q(starts_at__gt=Now()) | Q(ends_at__gt=Now()))
+        .values('product')
+        .annotate(boundary=Min(next_boundary))
+        .values('boundary')
+    )
+    return Subquery(upcoming, output_field=models.DateTimeField())
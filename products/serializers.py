@@ -1,5 +1,10 @@
-from rest_framework import serializers
-from .models import Category, Product, Discount
+from datetime import datetime
+from decimal import Decimal
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from .models import Category, Product, ProductQuerySet, Discount, StockReservation
 
 class CategorySerializer(serializers.ModelSerializer):
     subcategories = serializers.SerializerMethodField()
@@ -12,6 +17,44 @@ class CategorySerializer(serializers.ModelSerializer):
         return CategorySerializer(obj.subcategories.all(), many=True).data
 
 
+class CategoryTreeQuerySerializer(serializers.Serializer):
+    """
+    Validates the query parameters of the category tree mode.
+    """
+    tree = serializers.BooleanField(required=False, default=False)
+    root_id = serializers.IntegerField(required=False, min_value=1)
+
+
+def serialize_category_tree(categories, roots_only=True):
+    """
+    Nests flat category rows into `CategorySerializer`-shaped trees in O(n).
+
+    `categories` are dicts with `id`, `name`, `description` and `parent_id`
+    (e.g. from `.values()`). A category whose parent is not among the rows is a
+    root, so a full table yields the top-level categories and a subtree yields
+    its own root. With `roots_only=False` every category is returned, in row
+    order, each with its own subtree, as `CategorySerializer(many=True)` does.
+    """
+    nodes = {
+        category['id']: {
+            'id': category['id'],
+            'name': category['name'],
+            'description': category['description'],
+            'parent': category['parent_id'],
+            'subcategories': [],
+        }
+        for category in categories
+    }
+    roots = []
+    for node in nodes.values():
+        parent = nodes.get(node['parent'])
+        if parent is None:
+            roots.append(node)
+        else:
+            parent['subcategories'].append(node)
+    return roots if roots_only else list(nodes.values())
+
+
 class ProductSerializer(serializers.ModelSerializer):
     final_price = serializers.SerializerMethodField()
 
@@ -20,7 +63,7 @@ class ProductSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'description', 'price', 'final_price', 'stock_quantity', 'created', 'category']
 
     def get_final_price(self, obj):
-        return Discount.calculate_final_price(obj)
+        return obj.final_price
 
     def validate_name(self, value):
         """
@@ -31,14 +74,258 @@ class ProductSerializer(serializers.ModelSerializer):
         return value
 
 
+# Fields whose to_representation returns a database value unchanged, so row encoders skip the call.
+_PASSTHROUGH_FIELDS = (
+    serializers.BooleanField, serializers.CharField, serializers.IntegerField, serializers.ReadOnlyField,
+    serializers.RelatedField, serializers.SerializerMethodField,
+)
+
+
+class RowEncoder:
+    """
+    Renders `.values()` rows exactly as a serializer class renders instances.
+
+    The serializer's fields are inspected once, when the encoder is built,
+    instead of on every object: each output field is mapped to a column
+    (`columns` renames, e.g. `{'category': 'category_id'}`) and to a converter,
+    or to nothing when the field would return the column value as is. Method
+    fields are expected to have a column holding their result. ISO-8601
+    datetimes and already-quantized decimals, the common cases, skip DRF's
+    per-value timezone lookup and decimal context setup; anything else goes
+    through the field's own `to_representation`.
+
+    Use `encoder(row)` for one row and `encoder.many(rows)` for a page, which
+    resolves the current timezone once. `encoder.columns` lists the columns to
+    select, for `.values(*encoder.columns)`.
+    """
+
+    def __init__(self, serializer_class, columns=None):
+        columns = columns or {}
+        self.plan = tuple(
+            (name, columns.get(name, name), field)
+            for name, field in serializer_class().fields.items() if not field.write_only
+        )
+        self.columns = tuple(column for _, column, _ in self.plan)
+
+    def __call__(self, row):
+        return self.many([row])[0]
+
+    def many(self, rows):
+        current_timezone = timezone.get_current_timezone() if settings.USE_TZ else None
+        plan = [(name, column, self.converter(field, current_timezone)) for name, column, field in self.plan]
+        encoded = []
+        for row in rows:
+            data = {}
+            for name, column, convert in plan:
+                value = row[column]
+                data[name] = value if convert is None or value is None else convert(value)
+            encoded.append(data)
+        return encoded
+
+    @staticmethod
+    def converter(field, current_timezone):
+        if isinstance(field, _PASSTHROUGH_FIELDS):
+            return None
+        if type(field) is serializers.DateTimeField and not hasattr(field, 'timezone') and current_timezone is not None \
+                and str(getattr(field, 'format', api_settings.DATETIME_FORMAT)).lower() == ISO_8601:
+            def convert_datetime(value):
+                if not isinstance(value, datetime) or value.tzinfo is None:
+                    return field.to_representation(value)
+                value = value.astimezone(current_timezone).isoformat()
+                return value[:-6] + 'Z' if value.endswith('+00:00') else value
+            return convert_datetime
+        if type(field) is serializers.DecimalField and getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING) \
+                and not field.localize and field.decimal_places is not None:
+            exponent = -field.decimal_places
+
+            def convert_decimal(value):
+                if isinstance(value, Decimal) and value.is_finite() and value.as_tuple().exponent == exponent:
+                    return '{:f}'.format(value)  # Already quantized by the database column
+                return field.to_representation(value)
+            return convert_decimal
+        return field.to_representation
+
+
+# Renders `.values(*PRODUCT_ROW_FIELDS)` rows exactly as ProductSerializer renders products.
+represent_product_row = RowEncoder(ProductSerializer, {'category': 'category_id'})
+PRODUCT_ROW_FIELDS = represent_product_row.columns
+
+
+class ProductBulkItemSerializer(serializers.ModelSerializer):
+    """
+    Validates one row of a bulk product upload without touching the database.
+
+    Name uniqueness and category existence are checked for the whole batch
+    at once by the view, so neither is looked up per row here.
+    """
+    category = serializers.IntegerField(min_value=1)
+
+    class Meta:
+        model = Product
+        fields = ['name', 'description', 'price', 'stock_quantity', 'category']
+
+
+class ProductBulkQuerySerializer(serializers.Serializer):
+    """
+    Validates the query parameters of the bulk product endpoint.
+    """
+    upsert = serializers.BooleanField(required=False, default=False)
+
+
+class ProductFilterSerializer(serializers.Serializer):
+    """
+    Validates the filtering and ordering query parameters of product listings.
+    """
+    category_id = serializers.IntegerField(required=False, min_value=1)
+    include_descendants = serializers.BooleanField(required=False, default=False)
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, min_value=Decimal("0"))
+    max_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, min_value=Decimal("0"))
+    in_stock = serializers.BooleanField(required=False, allow_null=True, default=None)
+    ordering = serializers.ChoiceField(
+        choices=[prefix + field for field in ProductQuerySet.ORDERING_FIELDS for prefix in ('', '-')],
+        required=False,
+    )
+
+    def validate(self, data):
+        if data.get('min_price') is not None and data.get('max_price') is not None and data['min_price'] > data['max_price']:
+            raise serializers.ValidationError("min_price cannot be greater than max_price.")
+        return data
+
+
+class ProductListQuerySerializer(ProductFilterSerializer):
+    """
+    Validates the query parameters of the product list: the filters plus the facets switch.
+    """
+    facets = serializers.BooleanField(required=False, default=False)
+
+
+class ProductSearchQuerySerializer(serializers.Serializer):
+    """
+    Validates the query parameters of the product search.
+    """
+    q = serializers.CharField(max_length=200, trim_whitespace=True)
+    category_id = serializers.IntegerField(required=False, min_value=1)
+
+
+class ProductBatchQuerySerializer(serializers.Serializer):
+    """
+    Validates the query parameters of the batch lookup: comma-separated product IDs.
+    """
+    MAX_IDS = 100
+    MAX_ID = 2 ** 63 - 1  # Largest value of the bigint primary key
+
+    ids = serializers.CharField()
+
+    def validate_ids(self, value):
+        """
+        Parse the IDs into a list without duplicates, keeping their order.
+        """
+        try:
+            ids = [int(product_id) for product_id in value.split(',') if product_id.strip()]
+        except ValueError:
+            raise serializers.ValidationError("IDs must be comma-separated integers.")
+        ids = list(dict.fromkeys(ids))
+        if not ids or min(ids) < 1:
+            raise serializers.ValidationError("Provide one or more positive product IDs.")
+        if max(ids) > self.MAX_ID:
+            raise serializers.ValidationError(f"Product IDs cannot exceed {self.MAX_ID}.")
+        if len(ids) > self.MAX_IDS:
+            raise serializers.ValidationError(f"At most {self.MAX_IDS} IDs can be requested at once.")
+        return ids
+
+
+class ProductExportQuerySerializer(ProductFilterSerializer):
+    """
+    Validates the query parameters of the catalogue export: the list filters plus an output format.
+    """
+    output = serializers.ChoiceField(choices=['ndjson', 'csv'], required=False, default='ndjson')
+
+
 class DiscountSerializer(serializers.ModelSerializer):
     class Meta:
         model = Discount
-        fields = ['id', 'product', 'discount_type', 'value']
+        fields = ['id', 'product', 'discount_type', 'value', 'starts_at', 'ends_at']
 
     def validate(self, data):
         if data['discount_type'] == Discount.PERCENTAGE and (data['value'] <= 0 or data['value'] > 100):
             raise serializers.ValidationError("Percentage discount must be between 1 and 100.")
         if data['discount_type'] == Discount.FIXED and data['value'] <= 0:
             raise serializers.ValidationError("Fixed discount value must be greater than 0.")
+        starts_at, ends_at = data.get('starts_at'), data.get('ends_at')
+        if starts_at and ends_at and ends_at <= starts_at:
+            raise serializers.ValidationError({'ends_at': "A discount must end after it starts."})
         return data
+
+
+class DiscountBulkItemSerializer(DiscountSerializer):
+    """
+    Validates one discount of a bulk write without looking its product up per row.
+    """
+    product = serializers.IntegerField(min_value=1)
+
+
+class DiscountCampaignSerializer(DiscountSerializer):
+    """
+    Validates a discount campaign: the discount terms, validated once, and the products it targets.
+
+    Products are chosen either by `product_ids` or by `filters`, which takes the
+    product list filters (e.g. a category subtree with `include_descendants`).
+    """
+    product_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, allow_empty=False, max_length=10000
+    )
+    filters = ProductFilterSerializer(required=False)
+
+    class Meta:
+        model = Discount
+        fields = ['campaign_key', 'discount_type', 'value', 'starts_at', 'ends_at', 'product_ids', 'filters']
+        extra_kwargs = {'campaign_key': {'required': True, 'allow_null': False, 'allow_blank': False}}
+
+    def validate(self, data):
+        data = super().validate(data)
+        if ('product_ids' in data) == ('filters' in data):
+            raise serializers.ValidationError("Provide either product_ids or filters.")
+        return data
+
+    def apply(self):
+        """
+        Apply the validated campaign; returns `(matched, created)` as `DiscountQuerySet.apply_campaign` does.
+        """
+        data = dict(self.validated_data)
+        product_ids, filters = data.pop('product_ids', None), data.pop('filters', None)
+        if product_ids is not None:
+            products = Product.objects.filter(pk__in=product_ids)
+        else:
+            products = Product.objects.filter_listing(**filters)
+        return Discount.objects.apply_campaign(data.pop('campaign_key'), products, **data)
+
+
+class StockReservationItemSerializer(serializers.Serializer):
+    """
+    One line of a stock reservation.
+    """
+    product = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class StockReservationRequestSerializer(serializers.Serializer):
+    """
+    Validates a reservation request: the cart's lines and an optional hold time.
+    """
+    items = StockReservationItemSerializer(many=True, allow_empty=False, max_length=100)
+    ttl_seconds = serializers.IntegerField(required=False, min_value=1, max_value=settings.STOCK_RESERVATION_MAX_TTL)
+
+    def validate_items(self, items):
+        """
+        Merge lines for the same product into `{product_id: quantity}`.
+        """
+        quantities = {}
+        for item in items:
+            quantities[item['product']] = quantities.get(item['product'], 0) + item['quantity']
+        return quantities
+
+
+class StockReservationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = StockReservation
+        fields = ['reference', 'product', 'quantity', 'status', 'expires_at']
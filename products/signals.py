@@ -0,0 +1,66 @@
+from django.db.models import CharField, Value
+from django.db.models.functions import Concat, Now, Substr
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from utils.cache_utils import bump_versions, invalidate_products
+from .models import Category, Discount, Product
+
+
+@receiver(post_save, sender=Discount)
+def reprice_on_discount_save(sender, instance, **kwargs):
+    """
+    Recomputes the stored final price of the discounted product.
+    """
+    product_ids = {instance.product_id, getattr(instance, '_loaded_product_id', None)} - {None}
+    Product.objects.filter(pk__in=product_ids).refresh_final_prices()
+    invalidate_products(product_ids)
+    instance._loaded_product_id = instance.product_id
+
+
+@receiver(post_delete, sender=Discount)
+def reprice_on_discount_delete(sender, instance, **kwargs):
+    """
+    Recomputes the stored final price once a discount no longer applies.
+    """
+    Product.objects.filter(pk=instance.product_id).refresh_final_prices()
+    invalidate_products([instance.product_id])
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_responses(sender, instance, **kwargs):
+    """
+    Evicts the cached responses that include the product.
+    """
+    invalidate_products([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+def reindex_category_products(sender, instance, created, **kwargs):
+    """
+    Refreshes the search documents of the category's products, which include its name.
+    """
+    if not created:
+        Product.objects.filter(category=instance).refresh_search_vectors()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_responses(sender, instance, **kwargs):
+    """
+    Evicts the category list and the product lists, which filter on the category tree.
+    """
+    bump_versions('categories', 'products')
+
+
+@receiver(post_delete, sender=Category)
+def reroot_orphaned_subcategories(sender, instance, **kwargs):
+    """
+    Rewrites the paths under a deleted category, whose children become roots (SET_NULL).
+    """
+    if not instance.path:
+        return
+    Category.objects.filter(path__startswith=instance.path).exclude(pk=instance.pk).update(
+        path=Concat(Value('/'), Substr('path', len(instance.path) + 1), output_field=CharField()),
+        updated=Now(),  # Their parent was cleared by an UPDATE that skips auto_now
+    )
@@ -1,6 +1,35 @@
+import base64
+import csv
+import itertools
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock, skipUnless
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from io import StringIO
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, models
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
 from rest_framework import status
-from .models import Category, Product, Discount
+from rest_framework.utils.encoders import JSONEncoder
+from benchmarks.endpoints import ENDPOINTS, call_endpoint, seed_catalogue
+from utils.db_router import PIN_COOKIE, ReplicaPinningMiddleware, replica_is_fresh, replica_lag
+from utils.metrics import RequestMetricsMiddleware, registry
+from utils.pagination_utils import EstimatedCountPaginator
+from utils.renderers import FastJSONRenderer
+from .management.commands.import_catalogue import Command
+from .models import Category, Product, Discount, StockReservation, final_price_expression
+from .serializers import CategorySerializer, ProductSerializer, PRODUCT_ROW_FIELDS, represent_product_row
 
 
 class ECommerceTests(APITestCase):
@@ -12,6 +41,7 @@ class ECommerceTests(APITestCase):
         """
         Set up test data for all test cases.
         """
+        cache.clear()
         self.category = Category.objects.create(name="Electronics", description="Electronic items")
         self.product = Product.objects.create(
             category=self.category,
@@ -34,6 +64,25 @@ class ECommerceTests(APITestCase):
         self.assertEqual(json_response["message"], "Categories retrieved successfully")
         self.assertEqual(json_response["status"], status.HTTP_200_OK)
 
+    def test_category_tree_in_one_query(self):
+        """
+        Test that tree mode returns only roots with full subtrees, in the serializer's format.
+        """
+        phones = Category.objects.create(name="Phones", parent=self.category)
+        android = Category.objects.create(name="Android", parent=phones)
+        Category.objects.create(name="Books")
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/categories/?tree=true")
+        json_response = response.json()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        roots = Category.objects.filter(parent__isnull=True).order_by("id")
+        self.assertEqual(json_response["data"], CategorySerializer(roots, many=True).data)
+
+        response = self.client.get(f"/api/categories/?tree=true&root_id={phones.id}")
+        subtree = response.json()["data"]
+        self.assertEqual([node["id"] for node in subtree], [phones.id])
+        self.assertEqual(subtree[0]["subcategories"][0]["id"], android.id)
+
     ############################ PRODUCT TESTS #############################
 
     def test_list_products_with_pagination(self):
@@ -92,6 +141,106 @@ class ECommerceTests(APITestCase):
         self.assertIn("errors", json_response)
         self.assertEqual(json_response["status"], status.HTTP_400_BAD_REQUEST)
 
+    def test_bulk_create_products(self):
+        """
+        Test bulk creating products with per-row errors and a fixed number of queries.
+        """
+        rows = [
+            {"name": f"Bulk {index}", "description": "Bulk", "price": "10.00", "stock_quantity": 1, "category": self.category.id}
+            for index in range(50)
+        ]
+        rows += [
+            {"name": "Laptop", "description": "Duplicate", "price": "1.00", "stock_quantity": 1, "category": self.category.id},
+            {"name": "Orphan", "description": "Orphan", "price": "1.00", "stock_quantity": 1, "category": 999999},
+            {"name": "Broken", "price": "free"},
+        ]
+        with self.assertNumQueries(5):  # categories, names, savepoint, insert, release
+            response = self.client.post("/api/products/bulk/", rows, format="json")
+        json_response = response.json()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(json_response["data"]["created"], 50)
+        self.assertEqual([error["row"] for error in json_response["data"]["errors"]], [50, 51, 52])
+        self.assertEqual(Product.objects.get(name="Bulk 7").final_price, Decimal("10.00"))
+
+    def test_bulk_upsert_products_from_ndjson(self):
+        """
+        Test upserting products by name from an NDJSON body.
+        """
+        Discount.objects.create(product=self.product, discount_type=Discount.PERCENTAGE, value=10)
+        body = (
+            '{"name": "Laptop", "description": "Updated", "price": "2000.00", "stock_quantity": 3, "category": %d}\n'
+            '{"name": "Mouse", "description": "New", "price": "20.00", "stock_quantity": 3, "category": %d}\n'
+        ) % (self.category.id, self.category.id)
+        response = self.client.post(
+            "/api/products/bulk/?upsert=true", body, content_type="application/x-ndjson"
+        )
+        json_response = response.json()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((json_response["data"]["created"], json_response["data"]["updated"]), (1, 1))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.final_price, Decimal("1800.00"))
+
+    def test_export_products_as_ndjson(self):
+        """
+        Test that the NDJSON export matches the API representation of each product.
+        """
+        Discount.objects.create(product=self.product, discount_type=Discount.PERCENTAGE, value=10)
+        Product.objects.create(category=self.category, name="Mouse", description="Mouse", price=20, stock_quantity=0)
+        response = self.client.get("/api/products/export/?in_stock=true")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        detail = self.client.get(f"/api/products/{self.product.id}/").json()["data"]
+        self.assertEqual(json.loads(lines[0]), detail)
+
+    def test_export_products_as_csv(self):
+        """
+        Test the CSV export header and rows.
+        """
+        response = self.client.get("/api/products/export/?output=csv")
+        rows = list(csv.reader(b"".join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[0], ["id", "name", "description", "price", "final_price", "stock_quantity", "created", "category"])
+        self.assertEqual(rows[1][1:6], ["Laptop", "Gaming Laptop", "1000.00", "1000.00", "10"])
+
+    def test_search_products(self):
+        """
+        Test searching products by name and by category name.
+        """
+        Product.objects.create(category=self.category, name="Mouse", description="Wireless mouse", price=20, stock_quantity=5)
+        response = self.client.get("/api/products/search/?q=laptop")
+        json_response = response.json()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["name"] for item in json_response["data"]], ["Laptop"])
+        response = self.client.get("/api/products/search/?q=electronic")
+        self.assertEqual(len(response.json()["data"]), 2)
+        response = self.client.get("/api/products/search/")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @skipUnless(connection.vendor == "postgresql", "Full-text and trigram search require PostgreSQL")
+    def test_search_products_ranks_and_tolerates_typos(self):
+        """
+        Test that name matches outrank description matches and misspelled names still match.
+        """
+        Product.objects.create(category=self.category, name="Laptop Bag", description="Bag", price=50, stock_quantity=5)
+        Product.objects.create(category=self.category, name="Dock", description="Dock for any laptop", price=80, stock_quantity=5)
+        names = [item["name"] for item in self.client.get("/api/products/search/?q=laptop").json()["data"]]
+        self.assertEqual(names[-1], "Dock")
+        names = [item["name"] for item in self.client.get("/api/products/search/?q=lapotp").json()["data"]]
+        self.assertIn("Laptop", names)
+
+    def test_search_pages_through_tied_ranks(self):
+        """
+        Test that following the search cursor returns every match once, even when their ranks tie.
+        """
+        for index in range(7):
+            Product.objects.create(category=self.category, name=f"Cable {index}", description="Cable", price=5, stock_quantity=1)
+        url, seen = "/api/products/search/?q=cable&page_size=2", []
+        while url:
+            json_response = self.client.get(url).json()
+            seen += [item["id"] for item in json_response["data"]]
+            url = json_response["next"]
+        self.assertEqual(sorted(seen), sorted(Product.objects.filter(name__startswith="Cable").values_list("id", flat=True)))
+
     def test_retrieve_product_details(self):
         """
         Test retrieving details of a specific product.
@@ -103,6 +252,38 @@ class ECommerceTests(APITestCase):
         self.assertEqual(json_response["message"], "Product retrieved successfully")
         self.assertEqual(json_response["status"], status.HTTP_200_OK)
 
+    def test_retrieve_products_by_ids(self):
+        """
+        Test that a batch lookup keeps the requested order, reports missing IDs and runs one query.
+        """
+        phone = Product.objects.create(category=self.category, name="Phone", description="Phone", price=500, stock_quantity=1)
+        Discount.objects.create(product=phone, discount_type=Discount.PERCENTAGE, value=10)
+        url = f"/api/products/batch/?ids={phone.id},9999,{self.product.id},{phone.id}"
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        json_response = response.json()
+        self.assertEqual(json_response["count"], 2)
+        self.assertEqual([product["id"] for product in json_response["data"]["products"]], [phone.id, self.product.id])
+        self.assertEqual(json_response["data"]["products"][0]["final_price"], 450)
+        self.assertEqual(json_response["data"]["missing"], [9999])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).json(), json_response)
+
+        # Only writes to the requested products evict the entry, including creating a missing one.
+        Product.objects.create(category=self.category, name="Other", description="Other", price=1, stock_quantity=1)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+        Product.objects.bulk_create([
+            Product(id=9999, category=self.category, name="Tablet", description="Tablet", price=300, stock_quantity=1)
+        ])
+        self.assertEqual(self.client.get(url).json()["data"]["missing"], [])
+
+        response = self.client.get("/api/products/batch/?ids=1,abc")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get("/api/products/batch/?ids=1,99999999999999999999999")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     ############################ DISCOUNT TESTS ############################
 
     def test_apply_discount(self):
@@ -115,3 +296,735 @@ class ECommerceTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(json_response["message"], "Discount applied successfully")
         self.assertEqual(json_response["status"], status.HTTP_201_CREATED)
+
+    def test_apply_discount_campaign_to_category_subtree(self):
+        """
+        Test that a campaign discounts a whole category subtree once, however often it is posted.
+        """
+        phones = Category.objects.create(name="Phones", parent=self.category)
+        phone = Product.objects.create(category=phones, name="Phone", description="Phone", price=200, stock_quantity=1)
+        other = Product.objects.create(
+            category=Category.objects.create(name="Books"), name="Book", description="Book", price=20, stock_quantity=1
+        )
+        data = {
+            "campaign_key": "electronics-20", "discount_type": "PERCENTAGE", "value": "20",
+            "filters": {"category_id": self.category.id, "include_descendants": True},
+        }
+        response = self.client.post("/api/discounts/campaigns/", data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()["data"], {"campaign_key": "electronics-20", "matched": 2, "created": 2})
+        self.assertEqual(Product.objects.get(pk=self.product.pk).final_price, Decimal("800.00"))
+        self.assertEqual(Product.objects.get(pk=phone.pk).final_price, Decimal("160.00"))
+        self.assertEqual(Product.objects.get(pk=other.pk).final_price, Decimal("20.00"))
+
+        response = self.client.post("/api/discounts/campaigns/", data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["data"]["created"], 0)
+        self.assertEqual(Discount.objects.filter(campaign_key="electronics-20").count(), 2)
+
+        response = self.client.post("/api/discounts/campaigns/", dict(data, product_ids=[other.id]), format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_apply_discount_campaign_command(self):
+        """
+        Test applying a campaign to a list of products from the command line.
+        """
+        out = StringIO()
+        call_command(
+            "apply_discount_campaign", "laptops", "--type", "FIXED", "--value", "100", "--products", f"{self.product.id},9999",
+            stdout=out,
+        )
+        self.assertIn("1 discounts created", out.getvalue())
+        self.assertEqual(Product.objects.get(pk=self.product.pk).final_price, Decimal("900.00"))
+
+    ############################ PRICING TESTS #############################
+
+    def test_final_price_uses_highest_discount(self):
+        """
+        Test that the batched final price matches the per-product calculation.
+        """
+        Discount.objects.create(product=self.product, discount_type=Discount.PERCENTAGE, value=10)
+        Discount.objects.create(product=self.product, discount_type=Discount.FIXED, value=150)
+        product = Product.objects.annotate(computed_price=final_price_expression()).get(id=self.product.id)
+        self.assertEqual(product.computed_price, Decimal("850.00"))
+        self.assertEqual(product.final_price, Decimal("850.00"))
+        response = self.client.get(f"/api/products/{self.product.id}/")
+        self.assertEqual(Decimal(str(response.json()["data"]["final_price"])), Decimal("850.00"))
+
+    def test_final_price_with_fractional_percentage(self):
+        """
+        Test that stored percentage discounts keep their cents on every backend.
+        """
+        for price, percentage, expected in [(10, 15, "8.50"), (7, 33, "4.69"), (19.99, 12.5, "17.49")]:
+            product = Product.objects.create(
+                category=self.category, name=f"Item {price}", description="Item", price=price, stock_quantity=1
+            )
+            Discount.objects.create(product=product, discount_type=Discount.PERCENTAGE, value=percentage)
+            product.refresh_from_db()
+            self.assertEqual(product.final_price, Decimal(expected))
+
+    def test_final_price_never_negative(self):
+        """
+        Test that a fixed discount larger than the price floors the final price at zero.
+        """
+        Discount.objects.create(product=self.product, discount_type=Discount.FIXED, value=5000)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.final_price, Decimal("0.00"))
+
+    def test_list_products_query_count_is_constant(self):
+        """
+        Test that listing a page of discounted products does not query per row.
+        """
+        for index in range(20):
+            product = Product.objects.create(
+                category=self.category, name=f"Item {index}", description="Item", price=100, stock_quantity=1
+            )
+            Discount.objects.create(product=product, discount_type=Discount.PERCENTAGE, value=5)
+        with self.assertNumQueries(2):  # one COUNT(*) and one page query
+            response = self.client.get("/api/products/?page_size=20")
+        self.assertEqual(len(response.json()["data"]), 20)
+
+    def test_final_price_is_maintained_on_discount_writes(self):
+        """
+        Test that the stored final price follows discount creates, updates and deletes.
+        """
+        discount = Discount.objects.create(product=self.product, discount_type=Discount.PERCENTAGE, value=10)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.final_price, Decimal("900.00"))
+
+        discount.value = 25
+        discount.save()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.final_price, Decimal("750.00"))
+
+        Discount.objects.filter(id=discount.id).update(discount_type=Discount.FIXED, value=100)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.final_price, Decimal("900.00"))
+
+        discount.delete()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.final_price, Decimal("1000.00"))
+
+    def test_final_price_follows_product_price_changes(self):
+        """
+        Test that changing a product's price re-applies its existing discounts.
+        """
+        Discount.objects.bulk_create([Discount(product=self.product, discount_type=Discount.PERCENTAGE, value=50)])
+        self.product.price = 200
+        self.product.save()
+        self.assertEqual(self.product.final_price, Decimal("100.00"))
+
+    def test_import_catalogue_command(self):
+        """
+        Test importing categories, products and discounts from files, with a resumable checkpoint.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            categories = os.path.join(directory, "categories.csv")
+            products = os.path.join(directory, "products.ndjson")
+            discounts = os.path.join(directory, "discounts.csv")
+            checkpoint = os.path.join(directory, "products.checkpoint")
+            with open(categories, "w") as handle:
+                handle.write("name,description,parent\nAndroid,,Phones\nPhones,Mobile phones,Electronics\n")
+            with open(products, "w") as handle:
+                for index in range(5):
+                    handle.write(json.dumps({
+                        "name": f"Phone {index}", "description": "Phone", "price": "100.00",
+                        "stock_quantity": 2, "category": "Android",
+                    }) + "\n")
+                handle.write('{"name": "Lost", "description": "?", "price": "1", "stock_quantity": 1, "category": "Nope"}\n')
+            with open(discounts, "w") as handle:
+                handle.write("product,discount_type,value\nPhone 0,FIXED,30\nPhone 1,PERCENTAGE,150\n")
+
+            call_command("import_catalogue", "categories", categories, stdout=StringIO(), stderr=StringIO())
+            call_command(
+                "import_catalogue", "products", products, "--batch-size", "2", "--checkpoint", checkpoint,
+                stdout=StringIO(), stderr=StringIO(),
+            )
+            call_command("import_catalogue", "products", products, "--checkpoint", checkpoint, stdout=StringIO(), stderr=StringIO())
+            call_command("import_catalogue", "discounts", discounts, stdout=StringIO(), stderr=StringIO())
+
+        android = Category.objects.get(name="Android")
+        self.assertEqual(android.path, f"{self.category.path}{android.parent_id}/{android.id}/")
+        self.assertEqual(Product.objects.filter(category=android).count(), 5)
+        self.assertEqual(Product.objects.get(name="Phone 0").final_price, Decimal("70.00"))
+        self.assertEqual(Product.objects.get(name="Phone 1").final_price, Decimal("100.00"))
+
+    def test_import_catalogue_resumes_idempotently(self):
+        """
+        Test that a resumed import links deferred parents, reports repeated names and does not duplicate discounts.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            categories = os.path.join(directory, "categories.csv")
+            discounts = os.path.join(directory, "discounts.csv")
+            checkpoint = os.path.join(directory, "categories.checkpoint")
+            with open(categories, "w") as handle:
+                handle.write("name,description,parent\nTablets,,Computers\nComputers,,Electronics\nMice,,\nMice,,\n")
+            with open(discounts, "w") as handle:
+                handle.write(f"product,discount_type,value\n{self.product.name},FIXED,30\n")
+
+            # Simulate a crash right after the first batch commits.
+            read_records = Command.read_records
+            crash = lambda command, *args: itertools.islice(read_records(command, *args), 1)
+            with mock.patch.object(Command, "read_records", autospec=True, side_effect=crash):
+                call_command(
+                    "import_catalogue", "categories", categories, "--batch-size", "1", "--checkpoint", checkpoint,
+                    stdout=StringIO(), stderr=StringIO(),
+                )
+            self.assertIsNone(Category.objects.get(name="Tablets").parent)
+            stderr = StringIO()
+            call_command("import_catalogue", "categories", categories, "--checkpoint", checkpoint, stdout=StringIO(), stderr=stderr)
+            for _ in range(2):
+                stdout = StringIO()
+                call_command("import_catalogue", "discounts", discounts, stdout=stdout, stderr=StringIO())
+            self.assertIn("Imported 0 discounts, skipped 0, 1 already imported.", stdout.getvalue())
+
+        self.assertEqual(Category.objects.get(name="Tablets").parent, Category.objects.get(name="Computers"))
+        self.assertIn("Record 4: missing or duplicate category name 'Mice'", stderr.getvalue())
+        self.assertEqual(self.product.discounts.count(), 1)
+
+    def test_rebuild_final_prices_command(self):
+        """
+        Test that the rebuild command restores stale stored prices.
+        """
+        url = f"/api/products/{self.product.id}/"
+        self.assertEqual(self.client.get(url).json()["data"]["final_price"], 1000)
+        # A plain QuerySet skips the repricing and cache eviction, like a raw SQL insert.
+        models.QuerySet(Discount).bulk_create([Discount(product=self.product, discount_type=Discount.FIXED, value=100)])
+        call_command("rebuild_final_prices", stdout=StringIO())
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.final_price, Decimal("900.00"))
+        self.assertEqual(self.client.get(url).json()["data"]["final_price"], 900)
+
+    def test_discount_windows_bound_the_final_price(self):
+        """
+        Test that only discounts inside their window apply and the next boundary is stored.
+        """
+        now = timezone.now()
+        starts_at = now + timedelta(hours=1)
+        Discount.objects.create(product=self.product, discount_type=Discount.FIXED, value=100, starts_at=starts_at)
+        Discount.objects.create(
+            product=self.product, discount_type=Discount.FIXED, value=300,
+            starts_at=now - timedelta(days=2), ends_at=now - timedelta(days=1),
+        )
+        Discount.objects.create(product=self.product, discount_type=Discount.FIXED, value=50, ends_at=now + timedelta(hours=2))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.final_price, Decimal("950.00"))
+        self.assertEqual(self.product.final_price_valid_until, starts_at)
+
+        response = self.client.post("/api/discounts/", {
+            "product": self.product.id, "discount_type": "FIXED", "value": 10,
+            "starts_at": starts_at.isoformat(), "ends_at": now.isoformat(),
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_apply_discount_windows_command(self):
+        """
+        Test that the scheduler reprices products once a discount window opens.
+        """
+        discount = Discount.objects.create(
+            product=self.product, discount_type=Discount.PERCENTAGE, value=10, starts_at=timezone.now() + timedelta(hours=1)
+        )
+        self.assertEqual(self.client.get(f"/api/products/{self.product.id}/").json()["data"]["final_price"], 1000)
+
+        # Let the window open without a discount write, as the passing of time does.
+        past = timezone.now() - timedelta(seconds=1)
+        models.QuerySet.update(Discount.objects.filter(pk=discount.pk), starts_at=past)
+        Product.objects.filter(pk=self.product.pk).update(final_price_valid_until=past)
+        self.assertEqual(self.client.get(f"/api/products/{self.product.id}/").json()["data"]["final_price"], 1000)
+
+        out = StringIO()
+        call_command("apply_discount_windows", stdout=out)
+        self.assertIn("Repriced 1 products.", out.getvalue())
+        self.product.refresh_from_db()
+        self.assertIsNone(self.product.final_price_valid_until)
+        self.assertEqual(self.client.get(f"/api/products/{self.product.id}/").json()["data"]["final_price"], 900)
+
+    ############################ LISTING TESTS #############################
+
+    def test_filter_and_order_products_by_price(self):
+        """
+        Test filtering by final price range and stock, sorted by price descending.
+        """
+        for index, price in enumerate([50, 150, 250]):
+            Product.objects.create(
+                category=self.category, name=f"Item {index}", description="Item", price=price, stock_quantity=index
+            )
+        response = self.client.get(
+            f"/api/products/?category_id={self.category.id}&min_price=100&max_price=1000&in_stock=true&ordering=-price"
+        )
+        json_response = response.json()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["name"] for item in json_response["data"]], ["Laptop", "Item 2", "Item 1"])
+
+    def test_filter_products_by_category_subtree(self):
+        """
+        Test filtering by a category and its descendants, including after a move.
+        """
+        phones = Category.objects.create(name="Phones", parent=self.category)
+        android = Category.objects.create(name="Android", parent=phones)
+        books = Category.objects.create(name="Books")
+        Product.objects.create(category=android, name="Pixel", description="Phone", price=500, stock_quantity=1)
+        Product.objects.create(category=books, name="Novel", description="Book", price=20, stock_quantity=1)
+
+        response = self.client.get(f"/api/products/?category_id={self.category.id}&include_descendants=true")
+        self.assertEqual({item["name"] for item in response.json()["data"]}, {"Laptop", "Pixel"})
+
+        phones.parent = books
+        phones.save()
+        android.refresh_from_db()
+        self.assertEqual(android.path, f"/{books.id}/{phones.id}/{android.id}/")
+        response = self.client.get(f"/api/products/?category_id={books.id}&include_descendants=true")
+        self.assertEqual({item["name"] for item in response.json()["data"]}, {"Novel", "Pixel"})
+
+        with self.assertRaises(ValueError):
+            books.parent = android
+            books.save()
+
+    def test_list_products_with_facets(self):
+        """
+        Test that facet counts for the current filters come back with the page in one query.
+        """
+        books = Category.objects.create(name="Books")
+        Product.objects.create(category=books, name="Novel", description="Book", price=20, stock_quantity=0)
+        Product.objects.create(category=books, name="Atlas", description="Book", price=60, stock_quantity=3)
+        with self.assertNumQueries(3):  # COUNT(*), page, facets
+            response = self.client.get("/api/products/?facets=true&max_price=100")
+        facets = response.json()["facets"]
+        self.assertEqual(facets["categories"], [{"category": books.id, "count": 2}])
+        self.assertEqual(facets["in_stock"], {"true": 1, "false": 1})
+        counts = {bucket["min"]: bucket["count"] for bucket in facets["price"]}
+        self.assertEqual((counts[0], counts[50], counts[1000]), (1, 1, 0))
+
+        with self.assertNumQueries(2):  # Facets for the same filters come from the cache
+            self.client.get("/api/products/?facets=true&max_price=100&ordering=price")
+
+    def test_invalid_product_filters(self):
+        """
+        Test that invalid filter and ordering parameters are rejected.
+        """
+        response = self.client.get("/api/products/?min_price=10&max_price=5&ordering=name")
+        json_response = response.json()
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("ordering", json_response["errors"])
+
+    def test_cursor_pagination_walks_all_products(self):
+        """
+        Test that keyset pagination visits every product once, forwards and backwards.
+        """
+        for index in range(6):
+            Product.objects.create(
+                category=self.category, name=f"Item {index}", description="Item", price=100 + index % 2, stock_quantity=1
+            )
+        url = "/api/products/?pagination=cursor&page_size=3&ordering=-price"
+        seen, pages = [], []
+        while url:
+            json_response = self.client.get(url).json()
+            self.assertIsNone(json_response["count"])
+            seen.extend(item["id"] for item in json_response["data"])
+            pages.append(json_response)
+            url = json_response["next"]
+        expected = list(Product.objects.filter_listing(ordering="-price").values_list("id", flat=True))
+        self.assertEqual(seen, expected)
+
+        previous = self.client.get(pages[-1]["previous"]).json()
+        self.assertEqual(previous["data"], pages[-2]["data"])
+
+    def test_cursor_pagination_rejects_invalid_cursors(self):
+        """
+        Test that well-formed cursors with values of the wrong type are answered with 404, not 500.
+        """
+        for payload in ({"p": ["abc", "x"], "r": False}, {"p": [None, 1], "r": False}, {"p": ["1"], "r": False}):
+            cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+            response = self.client.get(f"/api/products/?pagination=cursor&ordering=price&cursor={cursor}")
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_pagination_exact_count(self):
+        """
+        Test that cursor pagination only counts rows when asked to.
+        """
+        response = self.client.get("/api/products/?pagination=cursor&count=exact")
+        self.assertEqual(response.json()["count"], 1)
+        response = self.client.get("/api/products/?pagination=cursor&cursor=not-a-cursor")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    ############################# STOCK TESTS ##############################
+
+    def test_reserve_commit_and_release_stock(self):
+        """
+        Test that reservations take stock, commits keep it taken and releases return it once.
+        """
+        mouse = Product.objects.create(category=self.category, name="Mouse", description="Mouse", price=20, stock_quantity=3)
+        items = [{"product": self.product.id, "quantity": 2}, {"product": mouse.id, "quantity": 1}, {"product": mouse.id, "quantity": 1}]
+        response = self.client.post("/api/stock/reservations/", {"items": items}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        reference = response.json()["data"][0]["reference"]
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock_quantity, 8)
+        self.assertEqual(Product.objects.get(pk=mouse.pk).stock_quantity, 1)
+        self.assertEqual(self.client.get(f"/api/products/{mouse.id}/").json()["data"]["stock_quantity"], 1)
+
+        response = self.client.post(f"/api/stock/reservations/{reference}/commit/")
+        self.assertEqual(response.json()["data"], {"lines": 2})
+        response = self.client.post(f"/api/stock/reservations/{reference}/release/")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Product.objects.get(pk=mouse.pk).stock_quantity, 1)
+
+        response = self.client.post("/api/stock/reservations/", {"items": [{"product": mouse.id, "quantity": 1}]}, format="json")
+        reference = response.json()["data"][0]["reference"]
+        self.assertEqual(self.client.post(f"/api/stock/reservations/{reference}/release/").status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.post(f"/api/stock/reservations/{reference}/release/").status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Product.objects.get(pk=mouse.pk).stock_quantity, 1)
+        self.assertEqual(self.client.get(f"/api/stock/reservations/{reference}/").json()["data"][0]["status"], "RELEASED")
+
+    def test_reservations_never_oversell(self):
+        """
+        Test that reservations beyond the stock fail and a short cart reserves nothing.
+        """
+        mouse = Product.objects.create(category=self.category, name="Mouse", description="Mouse", price=20, stock_quantity=5)
+        statuses = [
+            self.client.post("/api/stock/reservations/", {"items": [{"product": mouse.id, "quantity": 1}]}, format="json").status_code
+            for _ in range(7)
+        ]
+        self.assertEqual(statuses.count(status.HTTP_201_CREATED), 5)
+        self.assertEqual(statuses.count(status.HTTP_409_CONFLICT), 2)
+        self.assertEqual(Product.objects.get(pk=mouse.pk).stock_quantity, 0)
+
+        items = [{"product": self.product.id, "quantity": 1}, {"product": mouse.id, "quantity": 1}]
+        response = self.client.post("/api/stock/reservations/", {"items": items}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.json()["errors"], {"products": [mouse.id]})
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock_quantity, 10)
+
+        response = self.client.post("/api/stock/reservations/", {"items": [{"product": 999999, "quantity": 1}]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_expired_reservations_are_released(self):
+        """
+        Test that expired holds cannot be committed and return their stock to later buyers.
+        """
+        first = StockReservation.objects.reserve({self.product.id: 6}, ttl=60)[0].reference
+        second = StockReservation.objects.reserve({self.product.id: 4}, ttl=60)[0].reference
+        StockReservation.objects.update(expires_at=datetime(2024, 1, 1, tzinfo=dt_timezone.utc))
+        self.assertEqual(self.client.post(f"/api/stock/reservations/{first}/commit/").status_code, status.HTTP_409_CONFLICT)
+
+        # A buyer running short releases the expired holds on the product...
+        response = self.client.post("/api/stock/reservations/", {"items": [{"product": self.product.id, "quantity": 7}]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock_quantity, 3)
+
+        # ...and the command releases whatever is left over.
+        StockReservation.objects.update(expires_at=datetime(2024, 1, 1, tzinfo=dt_timezone.utc))
+        call_command("release_expired_reservations", stdout=StringIO())
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock_quantity, 10)
+        self.assertFalse(StockReservation.objects.filter(reference=second, status=StockReservation.HELD).exists())
+
+    ######################## SERIALIZATION TESTS ###########################
+
+    def test_row_encoders_match_serializers(self):
+        """
+        Test that the .values() fast path renders products and categories exactly like the serializers.
+        """
+        phones = Category.objects.create(name="Phones", description="Mobile", parent=self.category)
+        Category.objects.create(name="Android", parent=phones)
+        Product.objects.create(category=phones, name="Phone", description="", price="199.99", stock_quantity=0)
+        Product.objects.create(category=phones, name="Case", description="Case", price=5, stock_quantity=100)
+        Discount.objects.create(product=self.product, discount_type=Discount.PERCENTAGE, value=15)
+
+        rows = Product.objects.order_by("id").values(*PRODUCT_ROW_FIELDS)
+        expected = ProductSerializer(Product.objects.order_by("id"), many=True).data
+        self.assertEqual(represent_product_row.many(rows), expected)
+        self.assertEqual(represent_product_row(rows[0]), expected[0])
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/categories/")
+        categories = Category.objects.prefetch_related("subcategories").order_by("id")
+        self.assertEqual(response.json()["data"], json.loads(json.dumps(CategorySerializer(categories, many=True).data)))
+
+        response = self.client.get(f"/api/products/{self.product.id}/")
+        self.assertEqual(response.json()["data"], json.loads(json.dumps(expected[0], cls=JSONEncoder)))
+
+    def test_fast_json_renderer_matches_json_renderer(self):
+        """
+        Test that FastJSONRenderer renders the same JSON as DRF's renderer, with and without orjson.
+        """
+        Discount.objects.create(product=self.product, discount_type=Discount.FIXED, value="0.50")
+        payload = self.client.get("/api/products/").data
+        payload["extra"] = {"when": datetime(2024, 5, 1, 12, 30, 15, 250, tzinfo=dt_timezone.utc), "ratio": Decimal("0.125"), 1: "\u2028"}
+        expected = JSONRenderer().render(payload)
+        self.assertEqual(json.loads(FastJSONRenderer().render(payload)), json.loads(expected))
+        with mock.patch("utils.renderers.orjson", None):
+            self.assertEqual(FastJSONRenderer().render(payload), expected)
+        self.assertNotIn("\u2028".encode(), FastJSONRenderer().render(payload))
+        self.assertEqual(FastJSONRenderer().render({"id": 2 ** 64}), JSONRenderer().render({"id": 2 ** 64}))
+
+    ############################ ASYNC TESTS ###############################
+
+    def test_async_endpoints_match_sync_endpoints(self):
+        """
+        Test that the async read endpoints return the same payloads as the DRF views.
+        """
+        Category.objects.create(name="Phones", parent=self.category)
+        Discount.objects.create(product=self.product, discount_type=Discount.PERCENTAGE, value=10)
+        for index in range(3):
+            Product.objects.create(category=self.category, name=f"Item {index}", description="Item", price=10, stock_quantity=1)
+        for url in [
+            "/api/categories/",
+            "/api/categories/?tree=true",
+            "/api/products/?page_size=2&page=2&ordering=-price",
+            f"/api/products/?category_id={self.category.id}&include_descendants=true&facets=true",
+            f"/api/products/{self.product.id}/",
+        ]:
+            with self.subTest(url=url):
+                async_response = self.client.get(url.replace("/api/", "/api/async/"))
+                self.assertEqual(async_response.status_code, status.HTTP_200_OK)
+                expected = self.client.get(url).json()
+                if expected.get("next"):
+                    expected["next"] = expected["next"].replace("/api/", "/api/async/")
+                if expected.get("previous"):
+                    expected["previous"] = expected["previous"].replace("/api/", "/api/async/")
+                self.assertEqual(async_response.json(), expected)
+
+        response = self.client.get("/api/async/products/999999/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get("/api/async/products/?pagination=cursor")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_async_endpoints_are_cached_and_conditional(self):
+        """
+        Test that the async endpoints serve ETag and Last-Modified, answer them with 304 and drop stale entries.
+        """
+        for url in ["/api/async/categories/", "/api/async/products/", f"/api/async/products/{self.product.id}/"]:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIn("Last-Modified", response)
+                with self.assertNumQueries(0):
+                    self.assertEqual(self.client.get(url).content, response.content)
+                    not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+                    self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+                    not_modified = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+                    self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.product.name = "Renamed"
+        self.product.save()
+        response = self.client.get(f"/api/async/products/{self.product.id}/")
+        self.assertEqual(response.json()["data"]["name"], "Renamed")
+        self.assertEqual(self.client.get("/api/async/products/").json()["data"][0]["name"], "Renamed")
+
+    ######################## QUERY BUDGET TESTS ############################
+
+    def test_endpoint_query_budgets(self):
+        """
+        Test that every endpoint stays within its query budget on a seeded catalogue.
+        """
+        context = seed_catalogue(products=60, depth=4, fanout=2, discounts_per_product=2)
+        for endpoint in ENDPOINTS:
+            name, _, _, budget = endpoint
+            with self.subTest(endpoint=name):
+                status_code, queries, _ = call_endpoint(self.client, endpoint, context, index=0)
+                self.assertLess(status_code, 400)
+                self.assertLessEqual(queries, budget)
+
+    ########################### REPLICA TESTS ##############################
+
+    @override_settings(DATABASE_REPLICAS=["replica"])
+    def test_reads_use_replicas_until_the_client_writes(self):
+        """
+        Test that safe requests read from a replica, and a client that wrote reads its writes from the primary.
+        """
+        def read_view(request):
+            routed.append(Product.objects.all().db)
+            return HttpResponse()
+
+        def write_view(request):
+            Product.objects.filter(pk=self.product.pk).update(stock_quantity=5)
+            routed.append(Product.objects.all().db)
+            return HttpResponse()
+
+        factory, routed = RequestFactory(), []
+        with mock.patch("utils.db_router.replica_is_fresh", return_value=True), \
+                mock.patch("utils.db_router.connections") as router_connections:
+            router_connections.__getitem__.return_value.in_atomic_block = False  # Outside the test's transaction
+            self.assertEqual(Product.objects.all().db, "default")  # Not in a request
+            ReplicaPinningMiddleware(read_view)(factory.get("/api/products/"))
+            ReplicaPinningMiddleware(read_view)(factory.post("/api/products/create/"))
+            response = ReplicaPinningMiddleware(write_view)(factory.get("/api/products/"))
+            pinned = factory.get("/api/products/")
+            pinned.COOKIES[PIN_COOKIE] = response.cookies[PIN_COOKIE].value
+            ReplicaPinningMiddleware(read_view)(pinned)
+        self.assertEqual(routed, ["replica", "default", "default", "default"])
+        self.assertEqual(response.cookies[PIN_COOKIE]["max-age"], settings.REPLICA_PIN_SECONDS)
+
+    @override_settings(DATABASE_REPLICAS=["replica"])
+    def test_async_requests_pin_after_a_write(self):
+        """
+        Test that a write made by an async view pins the client in an async middleware stack.
+        """
+        async def write_view(request):
+            await Product.objects.filter(pk=self.product.pk).aupdate(stock_quantity=5)
+            return HttpResponse()
+
+        response = async_to_sync(ReplicaPinningMiddleware(write_view))(RequestFactory().get("/api/products/"))
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+    def test_lagging_replicas_get_no_reads(self):
+        """
+        Test that a replica behind by more than REPLICA_MAX_LAG is skipped until a later check.
+        """
+        self.assertEqual(replica_lag("default"), 0.0)
+        with override_settings(REPLICA_MAX_LAG=5, REPLICA_LAG_CHECK_INTERVAL=60), \
+                mock.patch("utils.db_router.replica_lag", return_value=30.0) as lag, \
+                mock.patch.dict("utils.db_router._lag_checks", clear=True):
+            self.assertFalse(replica_is_fresh("replica"))
+            lag.return_value = 0.0
+            self.assertFalse(replica_is_fresh("replica"))  # Within the check interval
+            self.assertEqual(lag.call_count, 1)
+            with override_settings(REPLICA_LAG_CHECK_INTERVAL=0):
+                self.assertTrue(replica_is_fresh("replica"))
+
+    ########################### METRICS TESTS ##############################
+
+    def test_request_metrics_endpoint(self):
+        """
+        Test that per-route query and latency histograms are exposed and query budgets are enforced.
+        """
+        registry.reset()
+        self.client.get(f"/api/products/{self.product.id}/")
+        with self.settings(REQUEST_QUERY_BUDGET=1), self.assertLogs("utils.metrics", "WARNING") as logs:
+            self.client.get("/api/products/?page_size=5")
+        self.assertIn("ran 2 database queries (budget 1)", logs.output[0])
+
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        body = response.content.decode()
+        detail = 'route="api/products/<int:product_id>/",method="GET"'
+        self.assertIn(f"http_request_duration_seconds_count{{{detail}}} 1", body)
+        self.assertIn(f'http_request_db_queries_bucket{{{detail},le="+Inf"}} 1', body)
+        self.assertIn(f"http_response_render_duration_seconds_count{{{detail}}} 1", body)
+        self.assertIn('http_requests_over_query_budget_total{route="api/products/",method="GET"} 1', body)
+
+        self.client.generic("BREW", "/api/products/")
+        self.assertIn('method="other"', self.client.get("/metrics").content.decode())
+        self.assertNotIn("BREW", self.client.get("/metrics").content.decode())
+        with self.settings(METRICS_ALLOWED_IPS=[]):
+            self.assertEqual(self.client.get("/metrics").status_code, status.HTTP_403_FORBIDDEN)
+            self.client.force_login(User.objects.create_user("ops", password="x", is_staff=True))
+            self.assertEqual(self.client.get("/metrics").status_code, status.HTTP_200_OK)
+
+    def test_request_metrics_middleware_runs_async(self):
+        """
+        Test that the metrics middleware stays async in an async stack and still counts the queries.
+        """
+        async def view(request):
+            await Product.objects.acount()
+            return HttpResponse()
+
+        for middleware_class in (RequestMetricsMiddleware, ReplicaPinningMiddleware):
+            self.assertTrue(iscoroutinefunction(middleware_class(view)))
+        request = RequestFactory().get("/api/async/products/")
+        request.resolver_match = None
+        response = async_to_sync(RequestMetricsMiddleware(view))(request)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(request.request_stats.queries, 1)
+
+    ############################# ADMIN TESTS ##############################
+
+    def test_admin_changelists_run_a_fixed_number_of_queries(self):
+        """
+        Test that the changelist columns are loaded with the rows rather than queried per row.
+        """
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "password"))
+        urls = ["/admin/products/category/", "/admin/products/product/", "/admin/products/discount/"]
+
+        def query_counts():
+            counts = []
+            for url in urls:
+                with CaptureQueriesContext(connection) as captured:
+                    self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+                counts.append(len(captured))
+            return counts
+
+        Discount.objects.create(product=self.product, discount_type=Discount.FIXED, value=10)
+        before = query_counts()
+        for index in range(5):
+            category = Category.objects.create(name=f"Sub {index}", parent=self.category)
+            product = Product.objects.create(category=category, name=f"Item {index}", description="Item", price=10, stock_quantity=1)
+            Discount.objects.create(product=product, discount_type=Discount.PERCENTAGE, value=5)
+        self.assertEqual(query_counts(), before)
+
+        response = self.client.get("/admin/products/category/")
+        self.assertContains(response, "Sub 0, Sub 1, Sub 2, Sub 3, Sub 4")
+
+    def test_estimated_count_paginator(self):
+        """
+        Test that small querysets are counted exactly and large PostgreSQL ones from the planner.
+        """
+        paginator = EstimatedCountPaginator(Product.objects.order_by("id"), 10)
+        self.assertEqual(paginator.count, 1)
+        with mock.patch("utils.pagination_utils.estimate_count", return_value=5000000), \
+                mock.patch.object(connection, "vendor", "postgresql"):
+            paginator = EstimatedCountPaginator(Product.objects.order_by("id"), 10)
+            with self.assertNumQueries(0):
+                self.assertEqual(paginator.count, 5000000)
+
+    ############################ CACHE TESTS ###############################
+
+    def test_product_detail_is_cached_until_discounted(self):
+        """
+        Test that product detail responses are cached and evicted by a discount write.
+        """
+        url = f"/api/products/{self.product.id}/"
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            cached = self.client.get(url)
+        self.assertEqual(cached.json(), first.json())
+
+        with self.assertNumQueries(0):
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Discount.objects.create(product=self.product, discount_type=Discount.FIXED, value=100)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], first["ETag"])
+        self.assertEqual(response.json()["data"]["final_price"], 900.0)
+
+    def test_category_write_evicts_category_list(self):
+        """
+        Test that creating a category evicts the cached category list only.
+        """
+        self.client.get("/api/categories/")
+        detail_etag = self.client.get(f"/api/products/{self.product.id}/")["ETag"]
+        Category.objects.create(name="Books")
+        response = self.client.get("/api/categories/")
+        self.assertEqual(len(response.json()["data"]), 2)
+        self.assertEqual(self.client.get(f"/api/products/{self.product.id}/")["ETag"], detail_etag)
+
+    def test_conditional_get_with_last_modified(self):
+        """
+        Test that product detail and lists serve Last-Modified and answer If-Modified-Since with 304.
+        """
+        Product.objects.filter(pk=self.product.pk).update(updated=datetime(2024, 1, 1, tzinfo=dt_timezone.utc))
+        url = f"/api/products/{self.product.id}/"
+        response = self.client.get(url)
+        self.assertEqual(response["Last-Modified"], "Mon, 01 Jan 2024 00:00:00 GMT")
+        with self.assertNumQueries(0):
+            not_modified = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified.content, b"")
+
+        # A discount that changes the final price marks the product as modified...
+        Discount.objects.create(product=self.product, discount_type=Discount.FIXED, value=100)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE="Mon, 01 Jan 2024 00:00:00 GMT")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        updated = Product.objects.get(pk=self.product.pk).updated
+        self.assertGreater(updated, datetime(2024, 1, 1, tzinfo=dt_timezone.utc))
+
+        # ...one that is outbid by the existing discount does not.
+        Discount.objects.create(product=self.product, discount_type=Discount.PERCENTAGE, value=1)
+        self.assertEqual(Product.objects.get(pk=self.product.pk).updated, updated)
+
+        for list_url in ["/api/products/", "/api/categories/"]:
+            response = self.client.get(list_url)
+            with self.assertNumQueries(0):
+                not_modified = self.client.get(list_url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+            self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
@@ -1,10 +1,23 @@
 from django.urls import path
-from .views import CategoryListView, ProductListView, ProductCreateView, ProductDetailView, DiscountViewSet
+from . import async_views
+from .views import CategoryListView, ProductListView, ProductSearchView, ProductCreateView, ProductBulkCreateView, ProductExportView, ProductBatchView, ProductDetailView, DiscountViewSet, StockReservationViewSet
 
 urlpatterns = [
     path('categories/', CategoryListView.as_view(), name='category-list'),
     path('products/', ProductListView.as_view(), name='product-list'),
+    path('products/search/', ProductSearchView.as_view(), name='product-search'),
     path('products/create/', ProductCreateView.as_view(), name='product-create'),
+    path('products/bulk/', ProductBulkCreateView.as_view(), name='product-bulk-create'),
+    path('products/export/', ProductExportView.as_view(), name='product-export'),
+    path('products/batch/', ProductBatchView.as_view(), name='product-batch'),
     path('products/<int:product_id>/', ProductDetailView.as_view(), name='product-detail'),
+    path('async/categories/', async_views.category_list, name='async-category-list'),
+    path('async/products/', async_views.product_list, name='async-product-list'),
+    path('async/products/<int:product_id>/', async_views.product_detail, name='async-product-detail'),
     path('discounts/', DiscountViewSet.as_view({'post': 'create'}), name='discount-create'),
+    path('discounts/campaigns/', DiscountViewSet.as_view({'post': 'campaign'}), name='discount-campaign'),
+    path('stock/reservations/', StockReservationViewSet.as_view({'post': 'create'}), name='stock-reservation-create'),
+    path('stock/reservations/<uuid:reference>/', StockReservationViewSet.as_view({'get': 'retrieve'}), name='stock-reservation-detail'),
+    path('stock/reservations/<uuid:reference>/release/', StockReservationViewSet.as_view({'post': 'release'}), name='stock-reservation-release'),
+    path('stock/reservations/<uuid:reference>/commit/', StockReservationViewSet.as_view({'post': 'commit'}), name='stock-reservation-commit'),
 ]
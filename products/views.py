@@ -1,68 +1,186 @@
+import csv
+import io
+import itertools
+import json
 from rest_framework.generics import ListAPIView, RetrieveAPIView, CreateAPIView
+from rest_framework.parsers import JSONParser
+from rest_framework.views import APIView
 from rest_framework.viewsets import ViewSet
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.encoders import JSONEncoder
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from drf_yasg.utils import swagger_auto_schema
+from drf_yasg.utils import no_body, swagger_auto_schema
 from drf_yasg import openapi
 from rest_framework import status
-from .models import Category, Product, Discount
-from .serializers import CategorySerializer, ProductSerializer, DiscountSerializer
+from .models import Category, Product, Discount, InsufficientStock, StockReservation
+from .serializers import (
+    CategorySerializer, CategoryTreeQuerySerializer, serialize_category_tree, ProductSerializer,
+    ProductBatchQuerySerializer, ProductBulkItemSerializer, ProductBulkQuerySerializer, ProductExportQuerySerializer, ProductListQuerySerializer,
+    ProductSearchQuerySerializer, PRODUCT_ROW_FIELDS, represent_product_row, DiscountSerializer,
+    DiscountCampaignSerializer, StockReservationRequestSerializer, StockReservationSerializer,
+)
 from utils.response_utils import success_response, error_response
-from utils.pagination_utils import CustomPagination  # Import the custom pagination
+from utils.cache_utils import cache_response, get_or_set_versioned, invalidate_products
+from utils.pagination_utils import CustomPagination, KeysetPagination  # Import the custom pagination
+from utils.parsers import NDJSONParser
 
 ############################### CATEGORY API ###############################
 
 class CategoryListView(ListAPIView):
     """
     API to list all categories.
-    Supports nested categories using prefetch_related for subcategories.
+    Every category is returned with its nested subcategories, or only root
+    categories with their subtrees with 'tree=true'; both are built from one
+    flat query.
     """
-    queryset = Category.objects.prefetch_related('subcategories').order_by('id')  # Ensure QuerySet is ordered
+    queryset = Category.objects.order_by('id')  # Ensure QuerySet is ordered
     serializer_class = CategorySerializer
     pagination_class = None  # Disable pagination for categories
 
     @swagger_auto_schema(
         operation_summary="List Categories",
-        operation_description="Retrieve a list of all categories, including nested subcategories.",
+        operation_description="Retrieve a list of all categories, including nested subcategories. With 'tree=true', only root categories are returned, each with its full subtree, loaded in one query; 'root_id' limits the tree to one category and its descendants.",
+        manual_parameters=[
+            openapi.Parameter(
+                'tree', openapi.IN_QUERY, description="Return root categories with their full subtrees", type=openapi.TYPE_BOOLEAN
+            ),
+            openapi.Parameter(
+                'root_id', openapi.IN_QUERY, description="Tree mode only: return the subtree under this category", type=openapi.TYPE_INTEGER
+            ),
+        ],
         responses={200: CategorySerializer(many=True)}
     )
+    @cache_response(lambda view: ['categories'])
     def get(self, request, *args, **kwargs):
+        params = CategoryTreeQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return error_response("Invalid category parameters", validation_errors=params.errors)
+        tree = params.validated_data['tree']
         categories = self.get_queryset()
-        serializer = self.get_serializer(categories, many=True)
-        return success_response("Categories retrieved successfully", data=serializer.data)
+        if tree and params.validated_data.get('root_id') is not None:
+            categories = categories.subtree(params.validated_data['root_id'])
+        rows = categories.values('id', 'name', 'description', 'parent_id')
+        return success_response("Categories retrieved successfully", data=serialize_category_tree(rows, roots_only=tree))
 
 
 ############################### PRODUCT API ###############################
 class ProductListView(ListAPIView):
     serializer_class = ProductSerializer
     pagination_class = CustomPagination
+    listing_filters = {}  # Validated query parameters, set per request in get()
 
     @swagger_auto_schema(
         operation_summary="List Products",
-        operation_description="Retrieve a list of products with pagination. Filter products by category using 'category_id' query parameter.",
+        operation_description="Retrieve a list of products with pagination. Filter products by category, final price range and stock, and sort them with 'ordering'.",
         manual_parameters=[
             openapi.Parameter(
                 'category_id', openapi.IN_QUERY, description="Filter products by category ID", type=openapi.TYPE_INTEGER
-            )
+            ),
+            openapi.Parameter(
+                'include_descendants', openapi.IN_QUERY, description="Also match products in all subcategories of 'category_id'", type=openapi.TYPE_BOOLEAN
+            ),
+            openapi.Parameter(
+                'min_price', openapi.IN_QUERY, description="Minimum final price (inclusive)", type=openapi.TYPE_NUMBER
+            ),
+            openapi.Parameter(
+                'max_price', openapi.IN_QUERY, description="Maximum final price (inclusive)", type=openapi.TYPE_NUMBER
+            ),
+            openapi.Parameter(
+                'in_stock', openapi.IN_QUERY, description="Only products in stock (true) or out of stock (false)", type=openapi.TYPE_BOOLEAN
+            ),
+            openapi.Parameter(
+                'ordering', openapi.IN_QUERY, description="Sort by price, final_price, created or stock_quantity; prefix with '-' for descending", type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'facets', openapi.IN_QUERY, description="Also return product counts per category, final-price bucket and stock state for the current filters", type=openapi.TYPE_BOOLEAN
+            ),
+            openapi.Parameter(
+                'pagination', openapi.IN_QUERY, description="Set to 'cursor' for keyset pagination (follow 'next' links; no page numbers)", type=openapi.TYPE_STRING, enum=['page', 'cursor']
+            ),
+            openapi.Parameter(
+                'count', openapi.IN_QUERY, description="Cursor pagination only: include an 'exact' or planner-'estimate' count", type=openapi.TYPE_STRING, enum=['exact', 'estimate']
+            ),
         ],
         responses={200: ProductSerializer(many=True)}
     )
+    @cache_response(lambda view: ['products'])
     def get(self, request, *args, **kwargs):
+        params = ProductListQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return error_response("Invalid product filters", validation_errors=params.errors)
+        self.listing_filters = dict(params.validated_data)
+        include_facets = self.listing_filters.pop('facets')
+        if request.query_params.get('pagination') == 'cursor':
+            self.pagination_class = KeysetPagination
         queryset = self.get_queryset()
         page = self.paginate_queryset(queryset)
         if page is not None:
-            return self.get_paginated_response(self.get_serializer(page, many=True).data)
-        serializer = self.get_serializer(queryset, many=True)
-        return success_response("Products retrieved successfully", data=serializer.data)
+            response = self.get_paginated_response(represent_product_row.many(page))
+        else:
+            response = success_response("Products retrieved successfully", data=represent_product_row.many(queryset))
+        if include_facets:
+            response.data['facets'] = self.get_facets()
+        return response
 
     def get_queryset(self):
-        category_id = self.request.query_params.get('category_id')
-        queryset = Product.objects.select_related('category').order_by('id')
-        if category_id:
-            queryset = queryset.filter(category_id=category_id)
-        return queryset
+        return Product.objects.filter_listing(**self.listing_filters).values(*PRODUCT_ROW_FIELDS)
+
+    def get_facets(self):
+        return listing_facets(self.listing_filters)
 
 
+def listing_facets(listing_filters):
+    """
+    Facet counts for the list filters, cached by a hash of the filters (not the page).
+    """
+    filters = {key: value for key, value in listing_filters.items() if key != 'ordering'}
+    edges = settings.PRODUCT_PRICE_FACET_EDGES
+    return get_or_set_versioned(
+        ['products'],
+        f"product-facets:{sorted(filters.items())}:{edges}",
+        lambda: Product.objects.filter_listing(**filters).facet_counts(edges),
+    )
+
+
+class ProductSearchView(ListAPIView):
+    """
+    API to search products by relevance.
+    Uses the PostgreSQL full-text and trigram indexes, paginated by keyset.
+    """
+    serializer_class = ProductSerializer
+    pagination_class = KeysetPagination
+    search_params = {}  # Validated query parameters, set per request in get()
+
+    @swagger_auto_schema(
+        operation_summary="Search Products",
+        operation_description="Search products by name, description and category name, ranked by relevance (name matches rank highest) and tolerant of misspelled names. Follow the 'next' link for further pages.",
+        manual_parameters=[
+            openapi.Parameter(
+                'q', openapi.IN_QUERY, description="Search phrase (web-search syntax: quotes, 'or', '-')", type=openapi.TYPE_STRING, required=True
+            ),
+            openapi.Parameter(
+                'category_id', openapi.IN_QUERY, description="Only search products in this category", type=openapi.TYPE_INTEGER
+            ),
+        ],
+        responses={200: ProductSerializer(many=True)}
+    )
+    @cache_response(lambda view: ['products'])
+    def get(self, request, *args, **kwargs):
+        params = ProductSearchQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return error_response("Invalid search parameters", validation_errors=params.errors)
+        self.search_params = params.validated_data
+        page = self.paginate_queryset(self.get_queryset())
+        return self.get_paginated_response(represent_product_row.many(page))
 
+    def get_queryset(self):
+        queryset = Product.objects.all()
+        if self.search_params.get('category_id') is not None:
+            queryset = queryset.filter(category_id=self.search_params['category_id'])
+        return queryset.search(self.search_params.get('q', '')).order_by('-rank', '-id').values(*PRODUCT_ROW_FIELDS, 'rank')
 
 
 class ProductCreateView(CreateAPIView):
@@ -86,11 +204,179 @@ class ProductCreateView(CreateAPIView):
         return error_response("Failed to create product", validation_errors=serializer.errors)
 
 
+class ProductBulkCreateView(APIView):
+    """
+    API to create, or with 'upsert=true' create-or-update by name, many products at once.
+    Accepts a JSON array or an NDJSON body (Content-Type: application/x-ndjson).
+    """
+    parser_classes = [JSONParser, NDJSONParser]
+    batch_size = 1000  # Rows per INSERT/UPDATE statement
+    max_rows = 10000  # Maximum number of products per request
+
+    @swagger_auto_schema(
+        operation_summary="Bulk Create Products",
+        operation_description="Create many products in one request. Names and categories are checked for the whole batch with one query each, valid rows are inserted in batches and invalid rows are reported by their index. With 'upsert=true', products whose name already exists are updated instead of rejected.",
+        manual_parameters=[
+            openapi.Parameter(
+                'upsert', openapi.IN_QUERY, description="Update existing products with the same name", type=openapi.TYPE_BOOLEAN
+            )
+        ],
+        request_body=ProductBulkItemSerializer(many=True),
+        responses={201: "Counts of created and updated products, and per-row errors"}
+    )
+    def post(self, request, *args, **kwargs):
+        params = ProductBulkQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return error_response("Invalid bulk parameters", validation_errors=params.errors)
+        rows = request.data
+        if not isinstance(rows, list) or not rows:
+            return error_response("Expected a non-empty list of products")
+        if len(rows) > self.max_rows:
+            return error_response(f"A bulk request accepts at most {self.max_rows} products")
+
+        to_create, to_update, errors = self.validate_rows(rows, params.validated_data['upsert'])
+        if not to_create and not to_update:
+            return error_response("Failed to import products", validation_errors=errors)
+
+        with transaction.atomic():
+            Product.objects.bulk_create(to_create, batch_size=self.batch_size)
+            Product.objects.bulk_update(
+                to_update, ['description', 'price', 'stock_quantity', 'category'], batch_size=self.batch_size
+            )
+        # bulk_update also refreshes the updated products' final prices and search documents.
+        invalidate_products([product.pk for product in to_update])
+
+        data = {"created": len(to_create), "updated": len(to_update), "errors": errors}
+        status_code = status.HTTP_201_CREATED if to_create else status.HTTP_200_OK
+        return success_response("Products imported successfully", data=data, status_code=status_code)
+
+    def validate_rows(self, rows, upsert):
+        """
+        Validate every row, then check categories and names with one query each.
+
+        Returns the products to create, the products to update and a list of
+        `{"row": index, "errors": ...}` entries for rejected rows.
+        """
+        item_serializer = ProductBulkItemSerializer()
+        valid, errors = [], []
+        for index, row in enumerate(rows):
+            try:
+                valid.append((index, item_serializer.run_validation(row)))
+            except ValidationError as exc:
+                errors.append({"row": index, "errors": exc.detail})
+
+        category_ids = set(
+            Category.objects.filter(id__in={data['category'] for _, data in valid}).values_list('id', flat=True)
+        )
+        existing_ids = dict(
+            Product.objects.filter(name__in=[data['name'] for _, data in valid]).values_list('name', 'id')
+        )
+
+        to_create, to_update, seen_names = [], [], set()
+        for index, data in valid:
+            if data['category'] not in category_ids:
+                errors.append({"row": index, "errors": {"category": ["Category does not exist."]}})
+                continue
+            if data['name'] in seen_names:
+                errors.append({"row": index, "errors": {"name": ["Duplicate name in this request."]}})
+                continue
+            seen_names.add(data['name'])
+            product = Product(
+                name=data['name'],
+                description=data['description'],
+                price=data['price'],
+                stock_quantity=data['stock_quantity'],
+                category_id=data['category'],
+            )
+            if data['name'] not in existing_ids:
+                to_create.append(product)
+            elif upsert:
+                product.pk = existing_ids[data['name']]
+                to_update.append(product)
+            else:
+                errors.append({"row": index, "errors": {"name": ["A product with this name already exists."]}})
+        errors.sort(key=lambda error: error["row"])
+        return to_create, to_update, errors
+
+
+class ProductExportView(APIView):
+    """
+    API to stream the whole catalogue, with final prices, as NDJSON or CSV.
+    """
+    chunk_size = 2000  # Rows fetched per server-side cursor round trip
+
+    @swagger_auto_schema(
+        operation_summary="Export Products",
+        operation_description="Stream every product matching the list filters as NDJSON (one ProductSerializer object per line) or CSV. Rows are read through a server-side cursor, so memory use does not grow with the catalogue.",
+        manual_parameters=[
+            openapi.Parameter(
+                'output', openapi.IN_QUERY, description="Export format", type=openapi.TYPE_STRING, enum=['ndjson', 'csv']
+            ),
+            openapi.Parameter(
+                'category_id', openapi.IN_QUERY, description="Filter products by category ID", type=openapi.TYPE_INTEGER
+            ),
+            openapi.Parameter(
+                'include_descendants', openapi.IN_QUERY, description="Also match products in all subcategories of 'category_id'", type=openapi.TYPE_BOOLEAN
+            ),
+            openapi.Parameter(
+                'min_price', openapi.IN_QUERY, description="Minimum final price (inclusive)", type=openapi.TYPE_NUMBER
+            ),
+            openapi.Parameter(
+                'max_price', openapi.IN_QUERY, description="Maximum final price (inclusive)", type=openapi.TYPE_NUMBER
+            ),
+            openapi.Parameter(
+                'in_stock', openapi.IN_QUERY, description="Only products in stock (true) or out of stock (false)", type=openapi.TYPE_BOOLEAN
+            ),
+            openapi.Parameter(
+                'ordering', openapi.IN_QUERY, description="Sort by price, final_price, created or stock_quantity; prefix with '-' for descending", type=openapi.TYPE_STRING
+            ),
+        ],
+        responses={200: "A streamed NDJSON or CSV file"}
+    )
+    def get(self, request, *args, **kwargs):
+        params = ProductExportQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return error_response("Invalid export parameters", validation_errors=params.errors)
+        filters = dict(params.validated_data)
+        output = filters.pop('output')
+
+        rows = Product.objects.filter_listing(**filters).values(*PRODUCT_ROW_FIELDS).iterator(chunk_size=self.chunk_size)
+        if output == 'csv':
+            response = StreamingHttpResponse(self.stream_csv(rows), content_type='text/csv')
+        else:
+            response = StreamingHttpResponse(self.stream_ndjson(rows), content_type='application/x-ndjson')
+        response['Content-Disposition'] = f'attachment; filename="products.{output}"'
+        return response
+
+    def stream_ndjson(self, rows):
+        for chunk in self.chunked(rows):
+            yield ''.join(json.dumps(data, cls=JSONEncoder) + '\n' for data in represent_product_row.many(chunk))
+
+    def stream_csv(self, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(ProductSerializer.Meta.fields)
+        for chunk in self.chunked(rows):
+            writer.writerows(data.values() for data in represent_product_row.many(chunk))
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    def chunked(self, rows):
+        """
+        Group the cursor's rows so each chunk is written with one yield.
+        """
+        while chunk := list(itertools.islice(rows, self.chunk_size)):
+            yield chunk
+
+
 class ProductDetailView(RetrieveAPIView):
     """
     API to retrieve the details of a specific product.
     """
-    queryset = Product.objects.all()
+    queryset = Product.objects.values(*PRODUCT_ROW_FIELDS)
     serializer_class = ProductSerializer
 
     @swagger_auto_schema(
@@ -98,18 +384,66 @@ class ProductDetailView(RetrieveAPIView):
         operation_description="Retrieve detailed information of a specific product by ID, including the final price after applying discounts.",
         responses={200: ProductSerializer}
     )
+    @cache_response(
+        lambda view: [f"product:{view.kwargs.get('product_id')}"],
+        last_modified=lambda view: view.get_last_modified(),
+    )
     def get(self, request, *args, **kwargs):
         product_id = self.kwargs.get('product_id')
-        product = get_object_or_404(Product, id=product_id)
-        serializer = self.get_serializer(product)
-        return success_response("Product retrieved successfully", data=serializer.data)
+        product = get_object_or_404(self.get_queryset(), id=product_id)
+        return success_response("Product retrieved successfully", data=represent_product_row(product))
+
+    def get_last_modified(self):
+        """
+        The product's own modification time, which discount changes to its final price also bump.
+        """
+        return Product.objects.filter(id=self.kwargs.get('product_id')).values_list('updated', flat=True).first()
+
+
+class ProductBatchView(APIView):
+    """
+    API to retrieve several products by ID in one request, e.g. for a cart.
+    """
+    @swagger_auto_schema(
+        operation_summary="Retrieve Products by IDs",
+        operation_description=f"Retrieve up to {ProductBatchQuerySerializer.MAX_IDS} products, with their final prices, in one query. Products are returned in the order of 'ids'; IDs that match no product are listed under 'missing'.",
+        manual_parameters=[
+            openapi.Parameter(
+                'ids', openapi.IN_QUERY, description="Comma-separated product IDs", type=openapi.TYPE_STRING, required=True
+            ),
+        ],
+        responses={200: ProductSerializer(many=True)}
+    )
+    @cache_response(lambda view: view.get_cache_namespaces())
+    def get(self, request, *args, **kwargs):
+        params = ProductBatchQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return error_response("Invalid product IDs", validation_errors=params.errors)
+        ids = params.validated_data['ids']
+        rows = {row['id']: row for row in Product.objects.filter(pk__in=ids).values(*PRODUCT_ROW_FIELDS)}
+        data = {
+            'products': represent_product_row.many([rows[product_id] for product_id in ids if product_id in rows]),
+            'missing': [product_id for product_id in ids if product_id not in rows],
+        }
+        return success_response("Products retrieved successfully", data=data, count=len(rows))
+
+    def get_cache_namespaces(self):
+        """
+        The requested products' own namespaces, so writes to other products keep the entry.
+
+        Creating a product bumps its namespace too, which evicts responses listing it as missing.
+        """
+        params = ProductBatchQuerySerializer(data=self.request.query_params)
+        if not params.is_valid():
+            return ['products']  # Not cached: the handler answers 400
+        return [f'product:{product_id}' for product_id in params.validated_data['ids']]
 
 
 ############################### DISCOUNT API ###############################
 
 class DiscountViewSet(ViewSet):
     """
-    API to create a discount and apply it to a product.
+    API to create a discount and apply it to a product, or to a whole set of products as a campaign.
     """
     @swagger_auto_schema(
         operation_summary="Apply Discount",
@@ -126,3 +460,93 @@ class DiscountViewSet(ViewSet):
             serializer.save()
             return success_response("Discount applied successfully", data=serializer.data, status_code=status.HTTP_201_CREATED)
         return error_response("Failed to apply discount", validation_errors=serializer.errors)
+
+    @swagger_auto_schema(
+        operation_summary="Apply Discount Campaign",
+        operation_description="Apply one discount to many products at once, chosen by 'product_ids' or by product list 'filters' (e.g. a category subtree with 'include_descendants'). The terms are validated once and the discounts inserted in a single transaction. Requests are idempotent per 'campaign_key': products that already hold the campaign's discount are skipped.",
+        request_body=DiscountCampaignSerializer,
+        responses={201: "Discounts created", 200: "Campaign already applied"}
+    )
+    def campaign(self, request):
+        """
+        Apply a discount to every product a campaign targets.
+        """
+        serializer = DiscountCampaignSerializer(data=request.data)
+        if not serializer.is_valid():
+            return error_response("Failed to apply discount campaign", validation_errors=serializer.errors)
+        matched, created = serializer.apply()
+        data = {'campaign_key': serializer.validated_data['campaign_key'], 'matched': matched, 'created': created}
+        if created:
+            return success_response("Discount campaign applied successfully", data=data, status_code=status.HTTP_201_CREATED)
+        return success_response("Discount campaign already applied", data=data)
+
+
+############################### STOCK API ###############################
+
+class StockReservationViewSet(ViewSet):
+    """
+    API to reserve stock for a cart, then commit the sale or release the stock.
+    Stock is taken by guarded atomic decrements, so concurrent buyers cannot oversell.
+    """
+    @swagger_auto_schema(
+        operation_summary="Reserve Stock",
+        operation_description="Hold stock for every line of a cart, all or nothing. The hold expires after 'ttl_seconds' (default from settings) unless committed, after which the stock returns to the products. Responds with 409 and the short product IDs when any line cannot be covered.",
+        request_body=StockReservationRequestSerializer,
+        responses={201: StockReservationSerializer(many=True), 409: "Insufficient stock"}
+    )
+    def create(self, request):
+        serializer = StockReservationRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return error_response("Invalid reservation", validation_errors=serializer.errors)
+        quantities = serializer.validated_data['items']
+        missing = set(quantities) - set(Product.objects.filter(pk__in=quantities).values_list('pk', flat=True))
+        if missing:
+            return error_response("Invalid reservation", validation_errors={'items': [f"Unknown products {sorted(missing)}."]})
+        try:
+            reservations = StockReservation.objects.reserve(
+                quantities, serializer.validated_data.get('ttl_seconds', settings.STOCK_RESERVATION_TTL)
+            )
+        except InsufficientStock as exc:
+            return error_response(
+                "Insufficient stock", validation_errors={'products': exc.product_ids}, status_code=status.HTTP_409_CONFLICT
+            )
+        data = StockReservationSerializer(reservations, many=True).data
+        return success_response("Stock reserved successfully", data=data, status_code=status.HTTP_201_CREATED)
+
+    @swagger_auto_schema(
+        operation_summary="Retrieve Stock Reservation",
+        operation_description="Retrieve the lines of a reservation and their status.",
+        responses={200: StockReservationSerializer(many=True)}
+    )
+    def retrieve(self, request, reference=None):
+        reservations = StockReservation.objects.filter(reference=reference).order_by('product_id')
+        if not reservations:
+            return error_response("Reservation not found", status_code=status.HTTP_404_NOT_FOUND)
+        return success_response("Reservation retrieved successfully", data=StockReservationSerializer(reservations, many=True).data)
+
+    @swagger_auto_schema(
+        operation_summary="Release Stock Reservation",
+        operation_description="Cancel a held reservation and return its stock to the products.",
+        request_body=no_body,
+        responses={200: "Number of lines released", 409: "The reservation is not held"}
+    )
+    def release(self, request, reference=None):
+        released = StockReservation.objects.filter(reference=reference).release()
+        return self.transition_response(reference, released, "Reservation released successfully")
+
+    @swagger_auto_schema(
+        operation_summary="Commit Stock Reservation",
+        operation_description="Turn a held, unexpired reservation into a sale; its stock stays taken.",
+        request_body=no_body,
+        responses={200: "Number of lines committed", 409: "The reservation has expired or is not held"}
+    )
+    def commit(self, request, reference=None):
+        committed = StockReservation.objects.filter(reference=reference).commit()
+        return self.transition_response(reference, committed, "Reservation committed successfully")
+
+    def transition_response(self, reference, changed, message):
+        if changed:
+            return success_response(message, data={"lines": changed})
+        if not StockReservation.objects.filter(reference=reference).exists():
+            return error_response("Reservation not found", status_code=status.HTTP_404_NOT_FOUND)
+        return error_response("Reservation has expired or is no longer held", status_code=status.HTTP_409_CONFLICT)
@@ -0,0 +1,213 @@
+import functools
+import hashlib
+import time
+from contextlib import nullcontext
+from datetime import datetime, timezone as dt_timezone
+from urllib.parse import urlencode
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+from utils.db_router import use_primary
+
+
+def _version_key(namespace):
+    return f"cache-version:{namespace}"
+
+
+def get_versions(namespaces):
+    """
+    Return the current version of each namespace, initialising missing ones.
+
+    New versions are timestamps rather than 1, so a counter evicted from the
+    cache never comes back with a value an old entry was stored under.
+    """
+    keys = [_version_key(namespace) for namespace in namespaces]
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*namespaces):
+    """
+    Invalidate every cached response stored under the given namespaces.
+
+    The versions are bumped immediately and again once the surrounding
+    transaction commits, so a response cached from another connection's view
+    of the uncommitted data is not served afterwards.
+    """
+    if not namespaces:
+        return
+
+    def bump():
+        now = time.time_ns()
+        cache.set_many({_version_key(namespace): now for namespace in namespaces}, timeout=None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def invalidate_products(product_ids):
+    """
+    Evict the product list pages and the detail pages of the given products.
+    """
+    bump_versions('products', *(f'product:{product_id}' for product_id in product_ids))
+
+
+def get_or_set_versioned(namespaces, key, compute, timeout=None):
+    """
+    Return `compute()` cached under `key` until any of the namespaces is bumped.
+    """
+    versions = get_versions(namespaces)
+    digest = hashlib.sha1(f"{key}|{versions}".encode()).hexdigest()
+    return cache.get_or_set(f"value:{digest}", compute, timeout or settings.RESPONSE_CACHE_TIMEOUT)
+
+
+def _response_digest(request, namespaces, versions):
+    """
+    Hash of the request's host, path, sorted query and the namespace versions; the ETag of the response.
+    """
+    query = urlencode(sorted(request.GET.items()))
+    fingerprint = f"{request.get_host()}{request.path}?{query}|" + "|".join(
+        f"{namespace}={version}" for namespace, version in zip(namespaces, versions)
+    )
+    return hashlib.sha1(fingerprint.encode()).hexdigest()
+
+
+def _recently_bumped(versions):
+    """
+    Whether a namespace was bumped too recently for the read replicas to have caught up.
+    """
+    return time.time_ns() - max(versions) < settings.REPLICA_PIN_SECONDS * 1e9
+
+
+def _bumped_at(versions):
+    return datetime.fromtimestamp(max(versions) / 1e9, tz=dt_timezone.utc)
+
+
+def _validator_headers(etag, modified):
+    headers = {'ETag': etag}
+    if modified is not None:
+        headers['Last-Modified'] = http_date(modified.timestamp())
+    return headers
+
+
+def _not_modified_since(request, modified):
+    """
+    Whether the request has no `If-None-Match` and an `If-Modified-Since` no older than `modified`.
+    """
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return (
+        'If-None-Match' not in request.headers
+        and None not in (modified, if_modified_since)
+        and int(modified.timestamp()) <= if_modified_since
+    )
+
+
+def cache_response(namespaces, timeout=None, last_modified=None):
+    """
+    Cache a view handler's successful response data under versioned namespaces.
+
+    `namespaces` is a callable taking the view and returning the namespaces the
+    response depends on; bumping any of them (see `bump_versions`) invalidates
+    the entry. Responses carry a version-derived ETag and a `Last-Modified`
+    date: `last_modified(view)` when given (None for a missing resource),
+    otherwise the time the namespaces were last bumped, which also covers
+    deletions. The date is stored with the cached data, so it is only looked
+    up on a miss. A matching `If-None-Match`, or without one an
+    `If-Modified-Since` no older than that date, is answered with 304 before
+    the handler runs.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            view_namespaces = namespaces(view)
+            versions = get_versions(view_namespaces)
+            digest = _response_digest(request, view_namespaces, versions)
+            etag = f'"{digest}"'
+
+            if etag in request.headers.get('If-None-Match', ''):
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+            key = f"response:{type(view).__name__}:{digest}"
+            entry = cache.get(key)
+            # Until the read replicas have caught up with the write that bumped a
+            # namespace, compute from the primary so no stale response is cached.
+            with use_primary() if entry is None and _recently_bumped(versions) else nullcontext():
+                if entry is not None:
+                    data, modified = entry
+                elif last_modified is not None:
+                    modified = last_modified(view)
+                else:
+                    modified = _bumped_at(versions)
+                headers = _validator_headers(etag, modified)
+                if _not_modified_since(request, modified):
+                    return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+                if entry is None:
+                    response = handler(view, request, *args, **kwargs)
+                    if response.status_code != status.HTTP_200_OK:
+                        return response
+                    cache.set(key, (response.data, modified), timeout or settings.RESPONSE_CACHE_TIMEOUT)
+                else:
+                    response = Response(data, status=status.HTTP_200_OK)
+            for header, value in headers.items():
+                response[header] = value
+            return response
+        return wrapper
+    return decorator
+
+
+def acache_response(namespaces, timeout=None, last_modified=None):
+    """
+    `cache_response` for async function views, which return rendered responses.
+
+    `namespaces(request, **kwargs)` returns the namespaces and the optional
+    `last_modified(request, **kwargs)` is a coroutine function, both called
+    with the view's URL arguments. The rendered content is cached, with the
+    same ETag, `Last-Modified` and 304 handling as the DRF views.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            view_namespaces = namespaces(request, **kwargs)
+            versions = await sync_to_async(get_versions)(view_namespaces)
+            digest = _response_digest(request, view_namespaces, versions)
+            etag = f'"{digest}"'
+
+            if etag in request.headers.get('If-None-Match', ''):
+                return HttpResponseNotModified(headers={'ETag': etag})
+
+            key = f"async-response:{view.__name__}:{digest}"
+            entry = await cache.aget(key)
+            with use_primary() if entry is None and _recently_bumped(versions) else nullcontext():
+                if entry is not None:
+                    content, content_type, modified = entry
+                elif last_modified is not None:
+                    modified = await last_modified(request, **kwargs)
+                else:
+                    modified = _bumped_at(versions)
+                headers = _validator_headers(etag, modified)
+                if _not_modified_since(request, modified):
+                    return HttpResponseNotModified(headers=headers)
+
+                if entry is None:
+                    response = await view(request, *args, **kwargs)
+                    if response.status_code != status.HTTP_200_OK:
+                        return response
+                    entry = (response.content, response['Content-Type'], modified)
+                    await cache.aset(key, entry, timeout or settings.RESPONSE_CACHE_TIMEOUT)
+                else:
+                    response = HttpResponse(content, content_type=content_type)
+            for header, value in headers.items():
+                response[header] = value
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,171 @@
+"""
+Read-replica routing: reads go to the replicas in DATABASE_REPLICAS, writes to "default".
+
+Only reads made while handling a safe (GET, HEAD, OPTIONS) request are sent to
+a replica; everything else, including management commands and any read inside
+a transaction on the primary, stays on the primary. A request that writes
+pins the rest of its reads to the primary and sets a short-lived cookie
+(REPLICA_PIN_SECONDS), so the same client keeps reading from the primary
+until the replicas have caught up with its write.
+
+Each replica's replication lag is checked at most every
+REPLICA_LAG_CHECK_INTERVAL seconds; a replica further behind than
+REPLICA_MAX_LAG seconds, or one that cannot be reached, gets no reads until a
+later check finds it fresh again. With no healthy replica, reads fall back
+to the primary.
+"""
+import contextvars
+import random
+import threading
+import time
+from contextlib import contextmanager
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+PIN_COOKIE = 'primary_pinned'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class PinState:
+    """
+    Whether the current request's reads must use the primary, and whether it wrote.
+    """
+
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.wrote = False
+
+
+# Set by ReplicaPinningMiddleware for the duration of a request; None outside requests.
+_request_state = contextvars.ContextVar('replica_pin_state', default=None)
+
+_lag_lock = threading.Lock()
+_lag_checks = {}  # alias -> (monotonic time checked, fresh)
+
+
+def replica_lag(alias):
+    """
+    Seconds the replica is behind its primary; 0 for backends without replication.
+
+    On PostgreSQL a replica that has replayed everything it received counts as
+    current, so an idle primary does not make its replicas look stale.
+    """
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+            "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+        )
+        return float(cursor.fetchone()[0])
+
+
+def replica_is_fresh(alias):
+    """
+    Whether the replica is reachable and within REPLICA_MAX_LAG, re-checked every REPLICA_LAG_CHECK_INTERVAL.
+    """
+    now = time.monotonic()
+    with _lag_lock:
+        checked = _lag_checks.get(alias)
+        if checked is not None and now - checked[0] < settings.REPLICA_LAG_CHECK_INTERVAL:
+            return checked[1]
+        # Claim the check, so concurrent requests keep the previous answer instead of checking too.
+        _lag_checks[alias] = (now, checked[1] if checked else True)
+    try:
+        fresh = replica_lag(alias) <= settings.REPLICA_MAX_LAG
+    except DatabaseError:
+        fresh = False
+    with _lag_lock:
+        _lag_checks[alias] = (now, fresh)
+    return fresh
+
+
+@contextmanager
+def use_primary():
+    """
+    Send the current request's reads to the primary inside the block.
+    """
+    state = _request_state.get()
+    if state is None or state.pinned:
+        yield
+        return
+    state.pinned = True
+    try:
+        yield
+    finally:
+        state.pinned = False
+
+
+class PrimaryReplicaRouter:
+    """
+    Routes reads to a fresh replica and writes, with the reads that must see them, to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        if state is None or state.pinned or not settings.DATABASE_REPLICAS:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        replicas = [alias for alias in settings.DATABASE_REPLICAS if replica_is_fresh(alias)]
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication.
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaPinningMiddleware:
+    """
+    Scopes the router's read-your-writes pinning to one request and carries it to the client's next requests.
+
+    Unsafe methods and clients holding the pin cookie read from the primary;
+    a request that writes sets the cookie for REPLICA_PIN_SECONDS. Runs
+    natively in both sync and async stacks; the state is a context variable,
+    which asgiref carries to the threads that run the queries.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = PinState(pinned=request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES)
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        return self.pin_client(state, response)
+
+    async def __acall__(self, request):
+        state = PinState(pinned=request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES)
+        token = _request_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        return self.pin_client(state, response)
+
+    def pin_client(self, state, response):
+        if state.wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax')
+        return response
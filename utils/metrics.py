@@ -0,0 +1,243 @@
+"""
+Per-request database and latency metrics, exposed in the Prometheus text format.
+
+`RequestMetricsMiddleware` counts the queries each request runs and the time
+spent in them through a connection execute wrapper, times the response
+rendering (DRF's serialization to JSON) and the whole request, and records
+them in per-route histograms served by `metrics_view`. Requests running more
+queries than `REQUEST_QUERY_BUDGET` are logged and counted, which is how N+1
+patterns show up. Recording costs a wrapper call per query and a few
+histogram updates per request.
+
+The histograms live in process memory, so each worker exposes its own; scrape
+every worker, or run a single one, as with any per-process exporter. Only
+staff users and clients connecting from METRICS_ALLOWED_IPS may read them.
+"""
+import bisect
+import contextvars
+import logging
+import threading
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed, PermissionDenied
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+
+logger = logging.getLogger(__name__)
+
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+# Any other verb is labelled "other", so clients cannot create unbounded series.
+HTTP_METHODS = ('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS')
+
+
+class Histogram:
+    """
+    Bucketed observations, stored per bucket and made cumulative when exported.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last slot is +Inf
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Thread-safe per-route histograms and the over-budget counter.
+    """
+    HISTOGRAMS = {
+        'http_request_duration_seconds': ("Total time spent handling the request.", SECONDS_BUCKETS),
+        'http_request_db_queries': ("Database queries run by the request.", QUERY_BUCKETS),
+        'http_request_db_duration_seconds': ("Time spent executing the request's database queries.", SECONDS_BUCKETS),
+        'http_response_render_duration_seconds': ("Time spent rendering (serializing) the response.", SECONDS_BUCKETS),
+    }
+    OVER_BUDGET = 'http_requests_over_query_budget_total'
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {name: {} for name in self.HISTOGRAMS}
+            self.over_budget = {}
+
+    def record(self, labels, observations, over_budget=False):
+        """
+        Add one request's observations (metric name -> value) under the given label tuple.
+        """
+        with self.lock:
+            for name, value in observations.items():
+                histogram = self.histograms[name].get(labels)
+                if histogram is None:
+                    histogram = self.histograms[name][labels] = Histogram(self.HISTOGRAMS[name][1])
+                histogram.observe(value)
+            if over_budget:
+                self.over_budget[labels] = self.over_budget.get(labels, 0) + 1
+
+    def render(self):
+        """
+        The metrics in the Prometheus text exposition format (version 0.0.4).
+        """
+        lines = []
+        with self.lock:
+            for name, (description, _) in self.HISTOGRAMS.items():
+                lines += [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+                for labels, histogram in sorted(self.histograms[name].items()):
+                    label_text = format_labels(labels)
+                    cumulative = 0
+                    for bound, count in zip((*histogram.buckets, '+Inf'), histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+                    lines.append(f"{name}_sum{{{label_text}}} {histogram.sum}")
+                    lines.append(f"{name}_count{{{label_text}}} {histogram.count}")
+            lines += [
+                f"# HELP {self.OVER_BUDGET} Requests that ran more database queries than REQUEST_QUERY_BUDGET.",
+                f"# TYPE {self.OVER_BUDGET} counter",
+            ]
+            for labels, count in sorted(self.over_budget.items()):
+                lines.append(f"{self.OVER_BUDGET}{{{format_labels(labels)}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def format_labels(labels):
+    route, method = labels
+    route = route.replace('\\', '\\\\').replace('"', '\\"')
+    return f'route="{route}",method="{method}"'
+
+
+registry = MetricsRegistry()
+
+
+class RequestStats:
+    """
+    Query count and timings collected while one request is handled.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+
+# The stats of the request being handled. A context variable rather than a per-request
+# `execute_wrapper`, because under ASGI the queries run on another thread's connections;
+# asgiref carries the context over to that thread.
+_current_stats = contextvars.ContextVar('request_stats', default=None)
+
+
+def count_query(execute, sql, params, many, context):
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+def install_query_counter(connection, **kwargs):
+    """
+    Add `count_query` to a connection's wrappers once; first, so `execute_wrapper` blocks still pop their own.
+    """
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, count_query)
+
+
+class RequestMetricsMiddleware:
+    """
+    Records per-request query counts and timings into `registry`.
+
+    Place it first in MIDDLEWARE so the total time covers the whole stack.
+    It runs natively in both sync and async stacks, so under ASGI it does not
+    push the async views onto a thread. Disabled entirely with
+    METRICS_ENABLED=False.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        connection_created.connect(install_query_counter, dispatch_uid='utils.metrics.install_query_counter')
+        for connection in connections.all(initialized_only=True):
+            install_query_counter(connection)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = request.request_stats = RequestStats()
+        started = time.perf_counter()
+        token = _current_stats.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        self.record(request, stats, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        stats = request.request_stats = RequestStats()
+        started = time.perf_counter()
+        token = _current_stats.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        self.record(request, stats, time.perf_counter() - started)
+        return response
+
+    def record(self, request, stats, total):
+        match = request.resolver_match
+        labels = (match.route if match else 'unmatched', request.method if request.method in HTTP_METHODS else 'other')
+        budget = settings.REQUEST_QUERY_BUDGET
+        over_budget = bool(budget) and stats.queries > budget
+        if over_budget:
+            logger.warning("%s %s ran %d database queries (budget %d)", request.method, request.path, stats.queries, budget)
+        registry.record(labels, {
+            'http_request_duration_seconds': total,
+            'http_request_db_queries': stats.queries,
+            'http_request_db_duration_seconds': stats.db_time,
+            'http_response_render_duration_seconds': stats.render_time,
+        }, over_budget)
+
+    def process_template_response(self, request, response):
+        """
+        Time the rendering that follows, which is where DRF encodes the response body.
+        """
+        stats, started = request.request_stats, time.perf_counter()
+
+        def rendered(response):
+            stats.render_time = time.perf_counter() - started
+        response.add_post_render_callback(rendered)
+        return response
+
+
+def metrics_view(request):
+    """
+    Serve the collected metrics for Prometheus to scrape, to staff users and METRICS_ALLOWED_IPS.
+    """
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    user = getattr(request, 'user', None)
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS and not (user and user.is_staff):
+        raise PermissionDenied
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
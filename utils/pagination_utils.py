@@ -1,7 +1,57 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 from rest_framework import status
 
+
+def estimate_count(queryset):
+    """
+    Return the planner's row estimate for a queryset instead of running COUNT(*).
+
+    On PostgreSQL this reads `Plan Rows` from `EXPLAIN (FORMAT JSON)`, which
+    costs about as much as planning the query. Other backends fall back to an
+    exact count.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Django paginator that counts large querysets with the planner's estimate.
+
+    Meant for admin changelists over millions of rows, where an exact
+    COUNT(*) scans the table on every page view. Estimates below
+    `exact_count_threshold` are replaced by an exact count, which is then
+    cheap and keeps small or narrowly filtered lists precise. The page count
+    of a large list is approximate.
+    """
+    exact_count_threshold = 10000
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, 'query') or connections[self.object_list.db].vendor != 'postgresql':
+            return super().count  # Exact; estimate_count would count exactly anyway
+        estimate = estimate_count(self.object_list)
+        return estimate if estimate >= self.exact_count_threshold else self.object_list.count()
+
+
 class CustomPagination(PageNumberPagination):
     """
     Custom pagination for API responses.
@@ -25,3 +75,162 @@ class CustomPagination(PageNumberPagination):
             },
             status=status.HTTP_200_OK
         )
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination for deep, stable walks over large querysets.
+
+    Pages are selected with a `WHERE (a, b, id) > (...)` condition built from
+    the queryset's own ordering, so no OFFSET is scanned and no COUNT(*) runs
+    unless `count=exact` (or the cheaper `count=estimate`) is requested. The
+    ordering must end with a unique field such as `id`.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = [str(field) for field in queryset.query.order_by] or ['pk']
+        self.ordering_fields = [self.resolve_field(queryset, self.field_name(field)) for field in self.ordering]
+        self.count = self.get_count(queryset, request)
+
+        position, reverse = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.build_position_filter(position, reverse))
+        if reverse:
+            queryset = queryset.order_by(*[self.invert(field) for field in self.ordering])
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        # A cursor means there is a page on the side we came from.
+        self.has_next = has_more if not reverse else position is not None
+        self.has_previous = has_more if reverse else position is not None
+        self.first_position = self.get_position(results[0]) if results else None
+        self.last_position = self.get_position(results[-1]) if results else None
+        return results
+
+    def get_paginated_response(self, data):
+        """
+        Return the page in the standard response format.
+        """
+        return Response(
+            {
+                "status": status.HTTP_200_OK,
+                "message": "Products retrieved successfully",
+                "count": self.count,
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "data": data,
+            },
+            status=status.HTTP_200_OK
+        )
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode == 'exact':
+            return queryset.count()
+        if mode == 'estimate':
+            return estimate_count(queryset)
+        return None
+
+    def get_next_link(self):
+        if not self.has_next or self.last_position is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.last_position, False))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first_position is None:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.first_position, True))
+
+    def get_position(self, obj):
+        if isinstance(obj, dict):  # A .values() row
+            return [obj[self.field_name(field)] for field in self.ordering]
+        return [getattr(obj, self.field_name(field)) for field in self.ordering]
+
+    def build_position_filter(self, position, reverse):
+        """
+        Expand `(f1, f2, ...) > (v1, v2, ...)` into OR-ed equality prefixes,
+        honouring each field's own sort direction.
+        """
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            descending = field.startswith('-') != reverse
+            lookup = 'lt' if descending else 'gt'
+            name = self.field_name(field)
+            term = Q(**{f'{name}__{lookup}': position[index]})
+            for previous_field, value in zip(self.ordering[:index], position[:index]):
+                term &= Q(**{self.field_name(previous_field): value})
+            condition |= term
+        return condition
+
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps({'p': [str(value) for value in position], 'r': reverse})
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            position, reverse = payload['p'], bool(payload['r'])
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+            raise NotFound("Invalid cursor")
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound("Invalid cursor")
+        try:
+            position = [
+                value if field is None else field.to_python(value) for field, value in zip(self.ordering_fields, position)
+            ]
+        except (ValidationError, ValueError, TypeError):
+            raise NotFound("Invalid cursor")
+        if None in position:  # Cursors are only built from non-null orderings
+            raise NotFound("Invalid cursor")
+        return position, reverse
+
+    @staticmethod
+    def resolve_field(queryset, name):
+        """
+        The model field or annotation output field an ordering name refers to; None for related lookups.
+        """
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        try:
+            return queryset.model._meta.pk if name == 'pk' else queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+
+    @staticmethod
+    def field_name(field):
+        return field.lstrip('-')
+
+    @staticmethod
+    def invert(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {'name': self.cursor_query_param, 'required': False, 'in': 'query', 'schema': {'type': 'string'}},
+            {'name': self.page_size_query_param, 'required': False, 'in': 'query', 'schema': {'type': 'integer'}},
+            {'name': self.count_query_param, 'required': False, 'in': 'query', 'schema': {'type': 'string', 'enum': ['exact', 'estimate']}},
+        ]
@@ -0,0 +1,40 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # Optional; the stdlib encoder is used without it
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer that encodes with orjson when it is installed.
+
+    Output is the same JSON as `JSONRenderer`: datetimes, dates, times and
+    UUIDs are encoded natively by orjson (UTC as `Z`), and anything orjson does
+    not know, such as `Decimal` or lazy translation strings, goes through DRF's
+    `JSONEncoder.default`. Indented output (e.g. for the browsable API), non-
+    compact or ASCII-only settings, and a missing orjson fall back to the
+    stdlib encoder, as does any payload orjson cannot encode, such as an
+    integer outside the 64-bit range. Unlike the strict stdlib path, NaN and infinite floats are
+    rendered as `null` rather than raising.
+    """
+    fallback_encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if orjson is None or indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.fallback_encoder.default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            # E.g. an integer beyond 64 bits, which the stdlib encoder handles.
+            return super().render(data, accepted_media_type, renderer_context)
+        # Keep the output a strict JavaScript subset, as JSONRenderer does.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret